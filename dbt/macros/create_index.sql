@@ -0,0 +1,26 @@
+{#
+    Post-hook: index {{ this }} on `columns` unless it already has such an
+    index. Safe on every run of an incremental model, and on tables rebuilt
+    by swapping: the index is left unnamed so it cannot clash with the one
+    on the relation being replaced. Renders nothing on other adapters: the
+    DuckDB warehouse scans columns and has no use for these indexes.
+
+        +post-hook: "{{ create_index(['user_id', 'event_at']) }}"
+#}
+{% macro create_index(columns) %}
+{% if target.type == 'postgres' %}
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_indexes
+        WHERE schemaname = '{{ this.schema }}'
+          AND tablename = '{{ this.identifier }}'
+          AND indexdef LIKE '%USING btree ({{ columns | join(", ") }})'
+    ) THEN
+        CREATE INDEX ON {{ this }} ({{ columns | join(", ") }});
+    END IF;
+END
+$$
+{% endif %}
+{% endmacro %}
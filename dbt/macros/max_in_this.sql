@@ -0,0 +1,12 @@
+{#
+    Largest `column` already in {{ this }}, fetched before the model's query
+    runs so it can be inlined as a literal. Postgres plans `id > 123` from the
+    column's statistics, but guesses a third of the table for
+    `id > (SELECT MAX(id) ...)`, which turns an index lookup of the few new
+    rows into a full scan. Only call it inside an is_incremental() block.
+#}
+{% macro max_in_this(column, default=0) %}
+    {%- set result = run_query('SELECT MAX(' ~ column ~ ') FROM ' ~ this) -%}
+    {%- set value = result.columns[0].values()[0] -%}
+    {{ return(value if value is not none else default) }}
+{% endmacro %}
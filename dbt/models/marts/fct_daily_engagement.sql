@@ -0,0 +1,51 @@
+-- Engagement by day and event name for dashboards, from the
+-- user_event_daily rollup. daily_active_users counts users with any event
+-- that day. Incremental: only days whose rollup rows changed since the
+-- last run are recomputed and merged.
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='merge',
+        unique_key=['day', 'event_name']
+    )
+}}
+
+WITH daily AS (
+    SELECT * FROM {{ ref('user_event_daily') }}
+    {% if is_incremental() %}
+    WHERE day IN (
+        SELECT day
+        FROM {{ ref('user_event_daily') }}
+        WHERE last_event_id > {{ max_in_this('last_event_id') }}
+    )
+    {% endif %}
+),
+
+by_event AS (
+    SELECT
+        day,
+        event_name,
+        SUM(event_count) AS event_count,
+        COUNT(*) AS active_users,
+        MAX(last_event_id) AS last_event_id
+    FROM daily
+    GROUP BY day, event_name
+),
+
+by_day AS (
+    SELECT
+        day,
+        COUNT(DISTINCT user_id) AS daily_active_users
+    FROM daily
+    GROUP BY day
+)
+
+SELECT
+    e.day,
+    e.event_name,
+    e.event_count,
+    e.active_users,
+    d.daily_active_users,
+    e.last_event_id
+FROM by_event e
+JOIN by_day d ON e.day = d.day
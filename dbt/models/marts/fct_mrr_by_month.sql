@@ -1,52 +1,158 @@
+-- Incremental: closed months never change, so each run only recomputes the
+-- current month and any month touched by subscriptions inserted or canceled
+-- since the last run, and merges them on month. Earlier months stay as
+-- they were. Ids are assigned in insertion order, so, as in stg_events,
+-- subscriptions loaded late with older start dates are found by id. `dbt run --full-refresh -s fct_mrr_by_month` rebuilds history,
+-- e.g. after subscriptions were edited in place.
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='merge',
+        unique_key='month'
+    )
+}}
+
 WITH subscriptions AS (
     SELECT * FROM {{ ref('stg_subscriptions') }}
 ),
 
+{% if is_incremental() %}
+{% set last_subscription_id = max_in_this('last_subscription_id') %}
+last_snapshot AS (
+    SELECT MAX(snapshot_at) AS snapshot_at FROM {{ this }}
+),
+
+-- Earliest month affected by a subscription inserted (from its start month)
+-- or canceled (from its cancel month) since then, and never later than now
+recompute_from AS (
+    SELECT LEAST(
+        DATE_TRUNC('month', CURRENT_DATE),
+        MIN(DATE_TRUNC('month', CASE WHEN s.subscription_id > {{ last_subscription_id }} THEN s.started_at ELSE s.canceled_at END))
+    )::DATE AS month
+    FROM subscriptions s
+    CROSS JOIN last_snapshot l
+    WHERE s.subscription_id > {{ last_subscription_id }}
+       OR s.canceled_at >= l.snapshot_at
+),
+{% endif %}
+
 -- Generate a series of months
 months AS (
-    SELECT 
+    SELECT
         DATE_TRUNC('month', started_at)::DATE AS month
     FROM subscriptions
     WHERE started_at IS NOT NULL
+    {% if is_incremental() %}
+      AND started_at >= (SELECT month FROM recompute_from)
+    {% endif %}
     UNION
-    SELECT 
+    SELECT
         DATE_TRUNC('month', CURRENT_DATE)::DATE AS month
 ),
 
 month_series AS (
-    SELECT DISTINCT month 
+    SELECT DISTINCT month
     FROM months
     WHERE month IS NOT NULL
 ),
 
--- Calculate active subscriptions per month
-subscription_months AS (
+-- Expand each subscription over its own active months only: from its start
+-- month up to the month before it was canceled (or the last reported month),
+-- instead of cross joining every month with every subscription
+active_months AS (
     SELECT
-        m.month,
+        gs.month::DATE AS month,
         s.subscription_id,
         s.user_id,
         s.plan,
-        s.mrr,
-        s.started_at,
-        s.canceled_at
-    FROM month_series m
-    CROSS JOIN subscriptions s
-    WHERE DATE_TRUNC('month', s.started_at)::DATE <= m.month
-      AND (s.canceled_at IS NULL OR DATE_TRUNC('month', s.canceled_at)::DATE > m.month)
+        s.mrr
+    FROM subscriptions s
+    CROSS JOIN LATERAL generate_series(
+        {% if is_incremental() %}
+        -- Starting one month early so the bridge has the previous month
+        GREATEST(
+            DATE_TRUNC('month', s.started_at),
+            (SELECT month FROM recompute_from) - INTERVAL '1 month'
+        ),
+        {% else %}
+        DATE_TRUNC('month', s.started_at),
+        {% endif %}
+        LEAST(
+            COALESCE(DATE_TRUNC('month', s.canceled_at) - INTERVAL '1 month', 'infinity'),
+            (SELECT MAX(month) FROM month_series)
+        ),
+        INTERVAL '1 month'
+    ) AS gs(month)
+    {% if is_incremental() %}
+    WHERE s.canceled_at IS NULL
+       OR s.canceled_at >= (SELECT month FROM recompute_from) - INTERVAL '1 month'
+    {% endif %}
+),
+
+subscription_months AS (
+    SELECT a.*
+    FROM active_months a
+    JOIN month_series m ON a.month = m.month
+),
+
+-- MRR bridge: compare each customer's MRR with the previous calendar month
+user_months AS (
+    SELECT month, user_id, SUM(mrr) AS mrr
+    FROM active_months
+    GROUP BY month, user_id
+),
+
+user_changes AS (
+    SELECT
+        COALESCE(cur.month, (prev.month + INTERVAL '1 month')::DATE) AS month,
+        COALESCE(cur.mrr, 0) AS mrr,
+        COALESCE(prev.mrr, 0) AS previous_mrr
+    FROM user_months cur
+    FULL JOIN user_months prev
+        ON prev.user_id = cur.user_id
+       AND prev.month = (cur.month - INTERVAL '1 month')::DATE
+),
+
+mrr_changes AS (
+    SELECT
+        month,
+        SUM(CASE WHEN previous_mrr = 0 THEN mrr ELSE 0 END) AS new_mrr,
+        SUM(CASE WHEN previous_mrr > 0 AND mrr > previous_mrr THEN mrr - previous_mrr ELSE 0 END) AS expansion_mrr,
+        SUM(CASE WHEN mrr > 0 AND mrr < previous_mrr THEN previous_mrr - mrr ELSE 0 END) AS contraction_mrr,
+        SUM(CASE WHEN mrr = 0 THEN previous_mrr ELSE 0 END) AS churned_mrr
+    FROM user_changes
+    GROUP BY month
+),
+
+monthly AS (
+    SELECT
+        month,
+        COUNT(DISTINCT subscription_id) AS active_subscriptions,
+        COUNT(DISTINCT user_id) AS paying_customers,
+        SUM(mrr) AS total_mrr,
+        AVG(mrr) AS avg_mrr_per_customer,
+
+        -- By plan
+        SUM(CASE WHEN plan = 'starter' THEN mrr ELSE 0 END) AS mrr_starter,
+        SUM(CASE WHEN plan = 'professional' THEN mrr ELSE 0 END) AS mrr_professional,
+        SUM(CASE WHEN plan = 'enterprise' THEN mrr ELSE 0 END) AS mrr_enterprise
+
+    FROM subscription_months
+    GROUP BY month
 )
 
 SELECT
-    month,
-    COUNT(DISTINCT subscription_id) AS active_subscriptions,
-    COUNT(DISTINCT user_id) AS paying_customers,
-    SUM(mrr) AS total_mrr,
-    AVG(mrr) AS avg_mrr_per_customer,
-    
-    -- By plan
-    SUM(CASE WHEN plan = 'starter' THEN mrr ELSE 0 END) AS mrr_starter,
-    SUM(CASE WHEN plan = 'professional' THEN mrr ELSE 0 END) AS mrr_professional,
-    SUM(CASE WHEN plan = 'enterprise' THEN mrr ELSE 0 END) AS mrr_enterprise
-
-FROM subscription_months
-GROUP BY month
-ORDER BY month
+    m.*,
+
+    -- Movements since the previous calendar month
+    COALESCE(c.new_mrr, 0) AS new_mrr,
+    COALESCE(c.expansion_mrr, 0) AS expansion_mrr,
+    COALESCE(c.contraction_mrr, 0) AS contraction_mrr,
+    COALESCE(c.churned_mrr, 0) AS churned_mrr,
+
+    NOW()::TIMESTAMP AS snapshot_at,
+    (SELECT MAX(subscription_id) FROM subscriptions) AS last_subscription_id
+
+FROM monthly m
+LEFT JOIN mrr_changes c ON m.month = c.month
+ORDER BY m.month
@@ -26,6 +26,6 @@ SELECT
     , u.signup_at
     , EXTRACT(DAY FROM (s.created_at - u.signup_at)) AS days_to_subscribe
 FROM taskflow_users u
-LEFT JOIN stripe_customers sc ON LOWER(u.email) = LOWER(sc.email)
+LEFT JOIN stripe_customers sc ON u.email_key = sc.email_key
 LEFT JOIN stripe_subs s ON sc.stripe_customer_id = s.stripe_customer_id
 WHERE s.stripe_subscription_id IS NOT NULL  -- Only users with subscriptions
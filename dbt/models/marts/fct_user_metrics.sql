@@ -1,3 +1,17 @@
+-- Incremental: each run recomputes the event metrics of users with events
+-- rolled up since the last run (event ids above the highest last_event_id
+-- already built) in full from user_event_daily, so they are exact. Those
+-- users, new users and users whose profile or subscription changed are
+-- merged on user_id; everyone else keeps their row.
+-- `dbt run --full-refresh -s fct_user_metrics` rebuilds everything.
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='merge',
+        unique_key='user_id'
+    )
+}}
+
 WITH users AS (
     SELECT * FROM {{ ref('stg_users') }}
 ),
@@ -6,29 +20,66 @@ subscriptions AS (
     SELECT * FROM {{ ref('stg_subscriptions') }}
 ),
 
-events AS (
-    SELECT * FROM {{ ref('stg_events') }}
+daily_events AS (
+    SELECT * FROM {{ ref('user_event_daily') }}
 ),
 
-user_event_summary AS (
+user_subscription_summary AS (
     SELECT
         user_id,
-        COUNT(*) AS total_events,
-        COUNT(DISTINCT DATE_TRUNC('day', event_at)) AS active_days,
-        MIN(event_at) AS first_event_at,
-        MAX(event_at) AS last_event_at
-    FROM events
+        MAX(CASE WHEN is_active THEN mrr ELSE 0 END) AS current_mrr,
+        SUM(CASE WHEN is_active THEN 1 ELSE 0 END) AS active_subscription_count
+    FROM subscriptions
     GROUP BY user_id
 ),
 
-user_subscription_summary AS (
+{% if is_incremental() %}
+new_event_users AS (
+    -- Read the rollup directly: a second reference to the daily_events CTE
+    -- would make Postgres materialize all of it instead of using the index
+    SELECT DISTINCT user_id
+    FROM {{ ref('user_event_daily') }}
+    WHERE last_event_id > {{ max_in_this('last_event_id') }}
+),
+{% endif %}
+
+user_event_summary AS (
     SELECT
         user_id,
-        MAX(CASE WHEN is_active THEN mrr ELSE 0 END) AS current_mrr,
-        SUM(CASE WHEN is_active THEN 1 ELSE 0 END) AS active_subscription_count
-    FROM subscriptions
+        SUM(event_count) AS total_events,
+        COUNT(DISTINCT day) AS active_days,
+        MIN(first_event_at) AS first_event_at,
+        MAX(last_event_at) AS last_event_at,
+        MAX(last_event_id) AS last_event_id
+    FROM daily_events
+    {% if is_incremental() %}
+    WHERE user_id IN (SELECT user_id FROM new_event_users)
+    {% endif %}
     GROUP BY user_id
+    {% if is_incremental() %}
+    UNION ALL
+    -- Everyone else's event metrics are unchanged
+    SELECT user_id, total_events, active_days, first_event_at, last_event_at, last_event_id
+    FROM {{ this }}
+    WHERE total_events > 0
+      AND user_id NOT IN (SELECT user_id FROM new_event_users)
+    {% endif %}
+){% if is_incremental() %},
+
+changed_users AS (
+    SELECT user_id FROM new_event_users
+    UNION
+    SELECT u.user_id
+    FROM users u
+    LEFT JOIN user_subscription_summary s ON u.user_id = s.user_id
+    LEFT JOIN {{ this }} t ON u.user_id = t.user_id
+    WHERE t.user_id IS NULL
+       OR (u.email, u.user_name, u.company, u.activated_at, u.plan,
+           COALESCE(s.current_mrr, 0), COALESCE(s.active_subscription_count, 0) > 0)
+          IS DISTINCT FROM
+          (t.email, t.user_name, t.company, t.activated_at, t.plan, t.current_mrr, t.is_paying)
 )
+{% endif %}
 
 SELECT
     u.user_id,
@@ -57,8 +108,14 @@ SELECT
         WHEN e.active_days >= 5 THEN 'medium'
         WHEN e.active_days > 0 THEN 'low'
         ELSE 'none'
-    END AS engagement_level
+    END AS engagement_level,
+
+    -- Highest event id rolled up for this user; the incremental watermark
+    e.last_event_id
 
 FROM users u
 LEFT JOIN user_event_summary e ON u.user_id = e.user_id
 LEFT JOIN user_subscription_summary s ON u.user_id = s.user_id
+{% if is_incremental() %}
+WHERE u.user_id IN (SELECT user_id FROM changed_users)
+{% endif %}
@@ -0,0 +1,46 @@
+-- One row per user, day and event name. Marts and dashboards read this
+-- instead of raw events, so their cost scales with active user-days.
+-- Incremental: each run finds the (user, day) pairs that received events
+-- with ids above the highest one already rolled up, recomputes those days in
+-- full from stg_events and merges them, so late events are counted exactly.
+-- `dbt run --full-refresh -s user_event_daily` rebuilds everything.
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='merge',
+        unique_key=['user_id', 'day', 'event_name']
+    )
+}}
+
+WITH events AS (
+    SELECT * FROM {{ ref('stg_events') }}
+),
+
+{% if is_incremental() %}
+changed_days AS (
+    SELECT DISTINCT user_id, event_at::DATE AS day
+    FROM {{ ref('stg_events') }}
+    WHERE event_id > {{ max_in_this('last_event_id') }}
+),
+{% endif %}
+
+daily AS (
+    SELECT
+        e.user_id,
+        e.event_at::DATE AS day,
+        e.event_name,
+        COUNT(*) AS event_count,
+        MIN(e.event_at) AS first_event_at,
+        MAX(e.event_at) AS last_event_at,
+        MAX(e.event_id) AS last_event_id
+    FROM events e
+    {% if is_incremental() %}
+    JOIN changed_days c
+        ON e.user_id = c.user_id
+       AND e.event_at >= c.day
+       AND e.event_at < c.day + 1
+    {% endif %}
+    GROUP BY e.user_id, e.event_at::DATE, e.event_name
+)
+
+SELECT * FROM daily
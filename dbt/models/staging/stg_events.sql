@@ -1,5 +1,14 @@
+-- Incremental (see dbt_project.yml) so fct_user_metrics can read only new
+-- events. Each run merges the source rows inserted since the last one: ids
+-- are assigned in insertion order, so this also picks up events loaded late
+-- with older timestamps (e.g. seed-data --append).
+-- `dbt run --full-refresh -s stg_events` rebuilds it, e.g. after a reseed.
+
 WITH source AS (
     SELECT * FROM {{ source('taskflow', 'events') }}
+    {% if is_incremental() %}
+    WHERE id > {{ max_in_this('event_id') }}
+    {% endif %}
 )
 
 SELECT
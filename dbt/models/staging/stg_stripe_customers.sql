@@ -5,6 +5,8 @@ WITH source AS (
 SELECT
 	id as stripe_customer_id
 	, email
+	-- Normalized by the sync; rows loaded before it did are normalized here
+	, COALESCE(email_key, LOWER(TRIM(email))) AS email_key
 	, name as customer_name
 	, TO_TIMESTAMP(created) AS created_at
 	, currency
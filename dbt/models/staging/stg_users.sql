@@ -5,6 +5,8 @@ WITH source AS (
 SELECT
     id AS user_id,
     email,
+    -- Same normalization as normalize_email() in sync_mock_stripe.py
+    LOWER(TRIM(email)) AS email_key,
     name AS user_name,
     company,
     created_at AS signup_at,
@@ -0,0 +1,312 @@
+# extract/extract_to_parquet.py
+"""Extract the production tables dbt reads to Parquet for the DuckDB warehouse.
+
+Each table lands in data/parquet/<schema>/<table>/created_month=YYYY-MM/, and
+the `warehouse` dbt target reads it from there, so mart builds never query
+the production database.
+
+Runs are incremental by created month:
+- events are append-only. Each run copies only rows with ids above the
+  highest one already extracted, into ids-<first>-<last>.parquet files in
+  their month. As in stg_events, this also picks up late, back-dated events.
+  If the source row at that highest id no longer matches its extracted copy,
+  the table was reloaded and is extracted again from scratch.
+- The other tables are updated in place (subscriptions get canceled, users
+  activate), and have no updated_at. Each month is fingerprinted in Postgres
+  and rewritten only when its fingerprint differs from the one in its file
+  name.
+
+File names carry all the state, so there is no state file to lose. Files are
+written under a temporary name and renamed into place, so a failed run never
+leaves a partial file.
+
+    python extract_to_parquet.py
+    python extract_to_parquet.py --full-refresh
+    python extract_to_parquet.py --tables events users
+"""
+import argparse
+import glob
+import io
+import os
+import re
+import shutil
+import time
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+DB_PARAMS = dict(
+    host="localhost",
+    port=5432,
+    database="taskflow_production",
+    user="taskflow",
+    password="taskflow_prod_pass"
+)
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'parquet')
+
+# Table -> expression for its created time. Stripe objects store `created`
+# as epoch seconds.
+STRIPE_CREATED = "TO_TIMESTAMP(created) AT TIME ZONE 'UTC'"
+TABLES = {
+    'public.users': 'created_at',
+    'public.subscriptions': 'created_at',
+    'public.events': 'created_at',
+    'public.stripe_charges': 'created_at',
+    'stripe.customers': STRIPE_CREATED,
+    'stripe.subscriptions': STRIPE_CREATED,
+    'stripe.charges': STRIPE_CREATED,
+    'stripe.invoices': STRIPE_CREATED,
+}
+
+# Append-only tables and their increasing id column
+APPEND_ONLY = {'public.events': 'id'}
+
+# Columns of the Stripe tables as sync_mock_stripe.py creates them, so a run
+# before the first Stripe sync can still give dbt an empty table to read
+STRIPE_COLUMNS = {
+    'stripe.customers': [
+        ('id', 'character varying'), ('email', 'character varying'), ('name', 'character varying'),
+        ('created', 'bigint'), ('currency', 'character varying'), ('company', 'character varying'),
+        ('industry', 'character varying'), ('synced_at', 'timestamp without time zone'),
+        ('row_hash', 'character varying'), ('email_key', 'character varying'),
+    ],
+    'stripe.subscriptions': [
+        ('id', 'character varying'), ('customer_id', 'character varying'), ('status', 'character varying'),
+        ('plan_id', 'character varying'), ('plan_amount', 'integer'), ('plan_currency', 'character varying'),
+        ('plan_interval', 'character varying'), ('created', 'bigint'), ('canceled_at', 'bigint'),
+        ('synced_at', 'timestamp without time zone'), ('row_hash', 'character varying'),
+    ],
+    'stripe.charges': [
+        ('id', 'character varying'), ('customer_id', 'character varying'), ('amount', 'integer'),
+        ('currency', 'character varying'), ('status', 'character varying'), ('paid', 'boolean'),
+        ('created', 'bigint'), ('subscription_id', 'character varying'),
+        ('synced_at', 'timestamp without time zone'), ('row_hash', 'character varying'),
+    ],
+    'stripe.invoices': [
+        ('id', 'character varying'), ('customer_id', 'character varying'),
+        ('subscription_id', 'character varying'), ('amount_due', 'integer'), ('amount_paid', 'integer'),
+        ('status', 'character varying'), ('created', 'bigint'), ('period_start', 'bigint'),
+        ('period_end', 'bigint'), ('synced_at', 'timestamp without time zone'),
+        ('row_hash', 'character varying'),
+    ],
+}
+
+# Postgres column types -> Arrow types; anything else is kept as text
+ARROW_TYPES = {
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'boolean': pa.bool_(),
+    'double precision': pa.float64(),
+    'real': pa.float32(),
+    'date': pa.date32(),
+    'timestamp without time zone': pa.timestamp('us'),
+    'timestamp with time zone': pa.timestamp('us', tz='UTC'),
+}
+
+# Row groups sized for DuckDB's parallel scans
+ROW_GROUP_SIZE = 500_000
+
+ID_RANGE_FILE = re.compile(r'ids-(\d+)-(\d+)\.parquet$')
+
+
+def table_exists(cur, table):
+    cur.execute("SELECT to_regclass(%s)", (table,))
+    return cur.fetchone()[0] is not None
+
+
+def arrow_schema(cur, table):
+    """Arrow schema of `table`, or of its expected columns if it does not exist yet"""
+    schema, name = table.split('.')
+    cur.execute("""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position
+    """, (schema, name))
+    columns = cur.fetchall() or STRIPE_COLUMNS.get(table, [])
+    return pa.schema([(column, ARROW_TYPES.get(data_type, pa.string())) for column, data_type in columns])
+
+
+def read_arrow(cur, query, params, schema):
+    """Run `query` through COPY ... CSV and parse it straight into an Arrow table"""
+    buf = io.BytesIO()
+    cur.copy_expert(f"COPY ({cur.mogrify(query, params).decode()}) TO STDOUT (FORMAT csv)", buf)
+    buf.seek(0)
+    return pa_csv.read_csv(
+        buf,
+        read_options=pa_csv.ReadOptions(column_names=schema.names),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=schema,
+            true_values=['t'],
+            false_values=['f'],
+            # COPY writes NULL unquoted and empty strings as ""
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+
+
+def write_parquet(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(data, path + '.tmp', row_group_size=ROW_GROUP_SIZE, compression='zstd')
+    os.replace(path + '.tmp', path)
+
+
+def partition_dir(table, month):
+    return os.path.join(OUTPUT_DIR, *table.split('.'), f'created_month={month}')
+
+
+def month_key(created):
+    return f"COALESCE(TO_CHAR({created}, 'YYYY-MM'), 'none')"
+
+
+def month_filter(created, month):
+    """WHERE clause and params for one month, as a range so Postgres can prune partitions"""
+    if month == 'none':
+        return f"{created} IS NULL", ()
+    return (f"{created} >= %s::DATE AND {created} < %s::DATE + INTERVAL '1 month'",
+            (f'{month}-01', f'{month}-01'))
+
+
+def extract_snapshot(cur, table, created, schema):
+    """Rewrite the months whose fingerprint changed; returns (rows, files) written"""
+    table_dir = os.path.join(OUTPUT_DIR, *table.split('.'))
+    cur.execute(f"""
+        SELECT
+            {month_key(created)} AS month,
+            COUNT(*),
+            MD5(COUNT(*) || ':' || SUM(('x' || LEFT(MD5(t::TEXT), 15))::BIT(60)::BIGINT))
+        FROM {table} t
+        GROUP BY 1
+    """)
+    months = {month: (count, fingerprint[:16]) for month, count, fingerprint in cur.fetchall()}
+
+    rows = files = 0
+    for month, (count, fingerprint) in sorted(months.items()):
+        directory = partition_dir(table, month)
+        path = os.path.join(directory, f'part-{fingerprint}.parquet')
+        if os.path.exists(path):
+            continue
+        where, params = month_filter(created, month)
+        data = read_arrow(cur, f"SELECT * FROM {table} t WHERE {where}", params, schema)
+        write_parquet(data, path)
+        for stale in glob.glob(os.path.join(directory, '*.parquet')):
+            if stale != path:
+                os.remove(stale)
+        rows += data.num_rows
+        files += 1
+
+    # Months that no longer have rows, e.g. after a reseed
+    for directory in glob.glob(os.path.join(table_dir, 'created_month=*')):
+        if directory.split('=', 1)[1] not in months:
+            shutil.rmtree(directory)
+
+    write_empty_marker(table_dir, schema, bool(months))
+    return rows, files
+
+
+def extract_appends(cur, table, created, id_column, schema):
+    """Copy rows with ids above the highest already extracted; returns (rows, files) written"""
+    table_dir = os.path.join(OUTPUT_DIR, *table.split('.'))
+    extracted = {int(m.group(2)): m.string for m in
+                 map(ID_RANGE_FILE.search, glob.glob(os.path.join(table_dir, '*', 'ids-*.parquet'))) if m}
+    watermark = max(extracted, default=0)
+
+    if watermark and not same_row(cur, table, id_column, watermark, extracted[watermark], schema):
+        # Ids restarted: the table was truncated and reloaded, possibly with
+        # as many rows or more, so the id alone does not show it
+        print(f"  {table}: source row {watermark} differs from its extracted copy, extracting it again")
+        shutil.rmtree(table_dir, ignore_errors=True)
+        watermark = 0
+
+    cur.execute(f"SELECT MAX({id_column}) FROM {table}")
+    last_id = cur.fetchone()[0] or 0
+
+    # Fixing the upper bound keeps each file's id range exact while inserts continue
+    cur.execute(f"""
+        SELECT DISTINCT {month_key(created)} FROM {table}
+        WHERE {id_column} > %s AND {id_column} <= %s
+    """, (watermark, last_id))
+    months = sorted(row[0] for row in cur.fetchall())
+
+    rows = files = 0
+    for month in months:
+        where, params = month_filter(created, month)
+        data = read_arrow(cur, f"""
+            SELECT * FROM {table} t
+            WHERE {id_column} > %s AND {id_column} <= %s AND {where}
+            ORDER BY {id_column}
+        """, (watermark, last_id) + params, schema)
+        ids = data.column(id_column)
+        name = f"ids-{pc.min(ids).as_py():012d}-{pc.max(ids).as_py():012d}.parquet"
+        write_parquet(data, os.path.join(partition_dir(table, month), name))
+        rows += data.num_rows
+        files += 1
+
+    write_empty_marker(table_dir, schema, bool(months) or watermark > 0)
+    return rows, files
+
+
+def same_row(cur, table, id_column, row_id, path, schema):
+    """Whether the source row `row_id` still matches its copy in the Parquet file `path`"""
+    extracted = pq.read_table(path, filters=[(id_column, '=', row_id)])
+    source = read_arrow(cur, f"SELECT * FROM {table} t WHERE {id_column} = %s", (row_id,), schema)
+    return extracted.to_pylist() == source.to_pylist()
+
+
+def write_empty_marker(table_dir, schema, has_data):
+    """Keep one zero-row file in an empty table so DuckDB can still read its columns"""
+    path = os.path.join(table_dir, 'empty.parquet')
+    if has_data:
+        if os.path.exists(path):
+            os.remove(path)
+    elif not os.path.exists(path):
+        write_parquet(schema.empty_table(), path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract production tables to Parquet for the DuckDB warehouse')
+    parser.add_argument('--tables', nargs='+', choices=[t.removeprefix('public.') for t in TABLES],
+                        help='only these tables (default: all)')
+    parser.add_argument('--full-refresh', action='store_true', help='delete and re-extract the selected tables')
+    args = parser.parse_args()
+
+    selected = [t for t in TABLES if not args.tables or t.removeprefix('public.') in args.tables]
+
+    print("=" * 60)
+    print(f"Parquet extract to {os.path.normpath(OUTPUT_DIR)}")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_PARAMS)
+    # One snapshot for the whole run, so tables are consistent with each other
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    cur = conn.cursor()
+    start = time.perf_counter()
+
+    for table in selected:
+        table_start = time.perf_counter()
+        if args.full_refresh:
+            shutil.rmtree(os.path.join(OUTPUT_DIR, *table.split('.')), ignore_errors=True)
+        schema = arrow_schema(cur, table)
+        if not table_exists(cur, table):
+            # e.g. the Stripe tables before the first sync: keep an empty
+            # table for dbt if its columns are known
+            table_dir = os.path.join(OUTPUT_DIR, *table.split('.'))
+            shutil.rmtree(table_dir, ignore_errors=True)
+            if len(schema):
+                write_empty_marker(table_dir, schema, False)
+            print(f"  {table:<24} missing in the source, skipped")
+            continue
+        if table in APPEND_ONLY:
+            rows, files = extract_appends(cur, table, TABLES[table], APPEND_ONLY[table], schema)
+        else:
+            rows, files = extract_snapshot(cur, table, TABLES[table], schema)
+        print(f"  {table:<24} {rows:>10,} rows  {files:>3} files  {time.perf_counter() - table_start:.1f}s")
+
+    conn.close()
+    print(f"\nDone in {time.perf_counter() - start:.1f}s")
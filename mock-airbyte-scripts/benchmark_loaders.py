@@ -0,0 +1,89 @@
+# airbyte-scripts/benchmark_loaders.py
+"""Compare the Stripe sync's execute_values upsert and COPY + merge loaders.
+
+Loads N synthetic charges into a scratch table with each loader, once into an
+empty table (all inserts) and once more with the same ids and every status
+flipped (all conflicts that rewrite the row), using the sync's own batch
+size and load functions.
+
+    python benchmark_loaders.py --rows 10000 100000 1000000
+"""
+import argparse
+import time
+
+import sync_mock_stripe as sync
+
+BENCH_SCHEMA = 'stripe_bench'
+
+
+def charge_rows(count, seed=0, flipped=False):
+    """Synthetic charge rows; `flipped` swaps every succeeded and failed status"""
+    for i in range(count):
+        succeeded = (i % 20 != 0) != flipped
+        yield (
+            f'ch_bench_{seed}_{i:012d}',
+            f'cus_bench_{i % 5000:08d}',
+            2900,
+            'usd',
+            'succeeded' if succeeded else 'failed',
+            succeeded,
+            1735689600 + i,
+            f'sub_bench_{i % 5000:08d}'
+        )
+
+
+def reset_table(conn):
+    cur = conn.cursor()
+    cur.execute(f"""
+        CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA};
+        DROP TABLE IF EXISTS {BENCH_SCHEMA}.charges;
+        CREATE TABLE {BENCH_SCHEMA}.charges (LIKE stripe.charges INCLUDING ALL);
+    """)
+    conn.commit()
+    cur.close()
+
+
+def timed_load(conn, loader, rows):
+    sync.LOADER = loader
+    start = time.perf_counter()
+    cur = conn.cursor()
+    for batch in sync.batched(rows, sync.BATCH_SIZE):
+        sync.load_batch(cur, 'bench_charges', batch)
+        conn.commit()
+    cur.close()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Stripe sync loaders')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--batch-size', type=int, default=sync.BATCH_SIZE)
+    args = parser.parse_args()
+    sync.BATCH_SIZE = args.batch_size
+
+    sync.STREAMS['bench_charges'] = dict(sync.STREAMS['charges'], table=f'{BENCH_SCHEMA}.charges')
+    sync.init_pools(1)
+
+    print("=" * 60)
+    print(f"Loader benchmark (batch size {sync.BATCH_SIZE})")
+    print("=" * 60)
+    print(f"{'rows':>10} {'loader':>8} {'insert s':>10} {'rows/s':>10} {'update s':>10} {'rows/s':>10}")
+
+    with sync.pooled_connection() as conn:
+        sync.create_tables_with(conn)
+        for count in args.rows:
+            for loader in ('upsert', 'copy'):
+                reset_table(conn)
+                inserted = timed_load(conn, loader, charge_rows(count))
+                # Changed rows, so the merge rewrites them instead of skipping
+                # them on an unchanged row hash
+                updated = timed_load(conn, loader, charge_rows(count, flipped=True))
+                print(f"{count:>10} {loader:>8} {inserted:>10.2f} {count / inserted:>10,.0f} "
+                      f"{updated:>10.2f} {count / updated:>10,.0f}")
+
+        cur = conn.cursor()
+        cur.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+        cur.close()
+
+    sync.close_pools()
@@ -0,0 +1,199 @@
+# airbyte-scripts/landing_zone.py
+"""Append-only Parquet / Arrow IPC landing zone for the Stripe sync.
+
+Each stream's rows land in <root>/<stream>/created_date=YYYY-MM-DD/, one file
+per batch and created day, stamped with the run's synced_at. Files are never
+rewritten by a sync: a record that changed is landed again by a later run,
+and readers keep the row with the latest synced_at per id.
+
+A run's files only count once its manifest is in <root>/_manifests/. The
+manifest lists the files the run added (and, for compactions, the ones it
+replaced), plus each stream's high-water mark for the next incremental run.
+It is written to a temporary name and renamed into place, so a run that dies
+leaves stray files but never a half-listed run. live_files() replays the
+manifests in order, so the warehouse can scan exactly the committed files in
+place, e.g. DuckDB's read_parquet([...]).
+"""
+import glob
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Partitions with at least this many live files are merged by compact()
+COMPACT_MIN_FILES = 2
+
+# Stripe fields that are not strings
+COLUMN_TYPES = {
+    'created': pa.int64(),
+    'canceled_at': pa.int64(),
+    'period_start': pa.int64(),
+    'period_end': pa.int64(),
+    'amount': pa.int64(),
+    'amount_due': pa.int64(),
+    'amount_paid': pa.int64(),
+    'plan_amount': pa.int64(),
+    'paid': pa.bool_(),
+}
+
+
+def arrow_schema(columns):
+    return pa.schema([(c, COLUMN_TYPES.get(c, pa.string())) for c in columns] +
+                     [('synced_at', pa.timestamp('us'))])
+
+
+def new_run_id():
+    """Sortable, unique id of a run: its UTC start time plus a random suffix"""
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ') + '-' + uuid.uuid4().hex[:8]
+
+
+def created_date(created):
+    return datetime.fromtimestamp(created, timezone.utc).strftime('%Y-%m-%d')
+
+
+def write_file(table, path, fmt):
+    """Write `table` to `path` atomically, as Parquet or Arrow IPC"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    if fmt == 'arrow':
+        with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, tmp, compression='zstd')
+    os.replace(tmp, path)
+
+
+def read_file(path):
+    if path.endswith(FORMATS['arrow']):
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+    return pq.read_table(path)
+
+
+def write_batch(root, stream, rows, columns, synced_at, run_id, batch_id, fmt):
+    """Land one batch of row tuples, one file per created day.
+
+    Returns manifest entries for the files written.
+    """
+    by_day = {}
+    created = columns.index('created')
+    for row in rows:
+        by_day.setdefault(created_date(row[created]), []).append(row)
+
+    schema = arrow_schema(columns)
+    entries = []
+    for day, day_rows in sorted(by_day.items()):
+        data = pa.Table.from_arrays(
+            [pa.array([row[i] for row in day_rows], type=schema.field(i).type) for i in range(len(columns))] +
+            [pa.array([synced_at] * len(day_rows), type=pa.timestamp('us'))],
+            schema=schema,
+        )
+        path = os.path.join(stream, f'created_date={day}', f'{run_id}-{batch_id}{FORMATS[fmt]}')
+        write_file(data, os.path.join(root, path), fmt)
+        entries.append({'stream': stream, 'path': path, 'created_date': day, 'rows': len(day_rows)})
+    return entries
+
+
+def manifests(root):
+    """Committed manifests, oldest first"""
+    for path in sorted(glob.glob(os.path.join(root, '_manifests', '*.json'))):
+        with open(path) as f:
+            yield json.load(f)
+
+
+def write_manifest(root, manifest):
+    path = os.path.join(root, '_manifests', f"{manifest['run_id']}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def high_water(root, stream):
+    """Max created landed for `stream` by any committed run, or None"""
+    marks = [m['streams'][stream]['high_water'] for m in manifests(root)
+             if m['streams'].get(stream, {}).get('high_water') is not None]
+    return max(marks, default=None)
+
+
+def live_entries(root):
+    """Manifest entries of every file added and not since replaced, in commit order"""
+    live = {}
+    for manifest in manifests(root):
+        for path in manifest.get('removed', []):
+            live.pop(path, None)
+        for entry in manifest.get('added', []):
+            live[entry['path']] = entry
+    return list(live.values())
+
+
+def live_files(root, stream):
+    """Absolute paths of the committed files of `stream`, for the warehouse to scan"""
+    return [os.path.join(root, e['path']) for e in live_entries(root) if e['stream'] == stream]
+
+
+def latest_rows(table):
+    """Keep the most recently synced row per id"""
+    if table.num_rows == 0:
+        return table
+    table = table.sort_by([('id', 'ascending'), ('synced_at', 'descending')])
+    ids = table.column('id').combine_chunks()
+    keep = pa.concat_arrays([pa.array([True]), pc.not_equal(ids[1:], ids[:-1])])
+    return table.filter(keep)
+
+
+def compact(root, streams, fmt):
+    """Merge each partition's small files into one, keeping the latest row per id.
+
+    Commits a manifest that adds the merged files and removes the originals,
+    then deletes the originals and any stray files a failed run left behind,
+    so it must not run while a sync of the same streams is writing.
+    Returns (partitions compacted, files deleted).
+    """
+    entries = [e for e in live_entries(root) if e['stream'] in streams]
+    partitions = {}
+    for entry in entries:
+        partitions.setdefault((entry['stream'], entry['created_date']), []).append(entry)
+
+    run_id = new_run_id()
+    started_at = datetime.now(timezone.utc).isoformat()
+    added, removed = [], []
+    for (stream, day), files in sorted(partitions.items()):
+        if len(files) < COMPACT_MIN_FILES:
+            continue
+        data = latest_rows(pa.concat_tables([read_file(os.path.join(root, e['path'])) for e in files],
+                                            promote_options='default'))
+        path = os.path.join(stream, f'created_date={day}', f'{run_id}-compacted{FORMATS[fmt]}')
+        write_file(data, os.path.join(root, path), fmt)
+        added.append({'stream': stream, 'path': path, 'created_date': day, 'rows': data.num_rows})
+        removed.extend(e['path'] for e in files)
+
+    if added:
+        write_manifest(root, {
+            'run_id': run_id,
+            'kind': 'compaction',
+            'format': fmt,
+            'started_at': started_at,
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'streams': {},
+            'added': added,
+            'removed': removed,
+        })
+
+    # Everything on disk that no manifest keeps alive
+    keep = {e['path'] for e in live_entries(root)}
+    stale = 0
+    for stream in streams:
+        for path in glob.glob(os.path.join(root, stream, 'created_date=*', '*')):
+            if os.path.relpath(path, root) not in keep:
+                os.remove(path)
+                stale += 1
+    return len(added), stale
@@ -1,15 +1,43 @@
 # airbyte-scripts/sync_mock_stripe.py
+import argparse
+import hashlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 import requests
-import psycopg2
+from requests.adapters import HTTPAdapter
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import execute_values
 import json
-from datetime import datetime
+import os
+from datetime import datetime, timezone
+
+import landing_zone
 
 # Mock Stripe API
 MOCK_API_URL = "http://localhost:5001"
+PAGE_SIZE = 100
+# Rows upserted (and checkpointed) per transaction
+BATCH_SIZE = 5000
+# How batches are written: 'upsert' (execute_values INSERT ... ON CONFLICT)
+# or 'copy' (COPY into a temp staging table, then one set-based merge)
+LOADER = 'upsert'
+
+# Records can change shortly after they are created (an invoice gets paid), so
+# incremental runs re-read this much history before the high-water mark.
+# Streams whose records change long after creation set 'full_read' instead.
+LOOKBACK_SECONDS = 7 * 24 * 3600
+
+# Lower bound used to split a stream's first sync into created windows
+# (2025-01-01, the start of the mock dataset)
+EPOCH_START = 1735689600
 
-# PostgreSQL connection
-conn = psycopg2.connect(
+# Where --output landing writes Parquet / Arrow IPC files instead of Postgres
+LANDING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'landing', 'stripe')
+
+# PostgreSQL connection settings, shared by every pooled connection
+DB_PARAMS = dict(
     host="localhost",
     port=5432,
     database="taskflow_production",
@@ -17,13 +45,134 @@ conn = psycopg2.connect(
     password="taskflow_prod_pass"
 )
 
+# Created by init_pools(): a keep-alive HTTP session and a Postgres connection
+# pool, both sized to the number of workers
+session = None
+db_pool = None
+
+def init_pools(workers, database=True):
+    global session, db_pool
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if database:
+        # One extra connection for the coordinating main thread
+        db_pool = ThreadedConnectionPool(1, workers + 1, **DB_PARAMS)
+
+def close_pools():
+    session.close()
+    if db_pool is not None:
+        db_pool.closeall()
+
+def normalize_email(email):
+    """Join key for matching Stripe customers to TaskFlow users by email.
+
+    Must stay in sync with the email_key expression in dbt's stg_users,
+    LOWER(TRIM(email)). SQL's TRIM only removes spaces, so strip(' ') does
+    too, not tabs, newlines or other whitespace.
+    """
+    return email.strip(' ').lower() if email else None
+
+@contextmanager
+def pooled_connection():
+    conn = db_pool.getconn()
+    try:
+        yield conn
+    finally:
+        db_pool.putconn(conn)
+
+# Per-stream extraction and load settings: the API endpoint, the target
+# table, how an API record maps to a row, and which columns an upsert updates.
+# 'full_read' streams are re-read in full every run rather than from their
+# high-water mark; unchanged rows are still skipped by their row hash.
+STREAMS = {
+    'customers': {
+        'endpoint': '/v1/customers',
+        'table': 'stripe.customers',
+        'columns': ['id', 'email', 'name', 'created', 'currency', 'company', 'industry', 'email_key'],
+        'update': ['email', 'name', 'email_key'],
+        'row': lambda c: (
+            c['id'],
+            c['email'],
+            c['name'],
+            c['created'],
+            c['currency'],
+            c.get('metadata', {}).get('company'),
+            c.get('metadata', {}).get('industry'),
+            normalize_email(c['email'])
+        ),
+    },
+    'subscriptions': {
+        'endpoint': '/v1/subscriptions',
+        'table': 'stripe.subscriptions',
+        'columns': ['id', 'customer_id', 'status', 'plan_id', 'plan_amount', 'plan_currency',
+                    'plan_interval', 'created', 'canceled_at'],
+        'update': ['status', 'canceled_at'],
+        # Cancellations land 30-120 days after created, far past any
+        # lookback, and the API has no updated-since filter
+        'full_read': True,
+        'row': lambda s: (
+            s['id'],
+            s['customer'],
+            s['status'],
+            s['plan']['id'],
+            s['plan']['amount'],
+            s['plan']['currency'],
+            s['plan']['interval'],
+            s['created'],
+            s.get('canceled_at')
+        ),
+    },
+    'charges': {
+        'endpoint': '/v1/charges',
+        'table': 'stripe.charges',
+        'columns': ['id', 'customer_id', 'amount', 'currency', 'status', 'paid', 'created',
+                    'subscription_id'],
+        'update': ['status'],
+        'row': lambda c: (
+            c['id'],
+            c['customer'],
+            c['amount'],
+            c['currency'],
+            c['status'],
+            c['paid'],
+            c['created'],
+            c.get('metadata', {}).get('subscription_id')
+        ),
+    },
+    'invoices': {
+        'endpoint': '/v1/invoices',
+        'table': 'stripe.invoices',
+        'columns': ['id', 'customer_id', 'subscription_id', 'amount_due', 'amount_paid', 'status',
+                    'created', 'period_start', 'period_end'],
+        'update': ['status', 'amount_paid'],
+        'row': lambda i: (
+            i['id'],
+            i['customer'],
+            i['subscription'],
+            i['amount_due'],
+            i['amount_paid'],
+            i['status'],
+            i['created'],
+            i['period_start'],
+            i['period_end']
+        ),
+    },
+}
+
 def create_tables():
     """Create tables for Stripe data"""
+    with pooled_connection() as conn:
+        create_tables_with(conn)
+    print("✓ Tables created in stripe schema")
+
+def create_tables_with(conn):
     cur = conn.cursor()
-    
+
     cur.execute("""
     CREATE SCHEMA IF NOT EXISTS stripe;
-    
+
     CREATE TABLE IF NOT EXISTS stripe.customers (
         id VARCHAR(255) PRIMARY KEY,
         email VARCHAR(255),
@@ -34,7 +183,7 @@ def create_tables():
         industry VARCHAR(255),
         synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
-    
+
     CREATE TABLE IF NOT EXISTS stripe.subscriptions (
         id VARCHAR(255) PRIMARY KEY,
         customer_id VARCHAR(255),
@@ -47,7 +196,7 @@ def create_tables():
         canceled_at BIGINT,
         synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
-    
+
     CREATE TABLE IF NOT EXISTS stripe.charges (
         id VARCHAR(255) PRIMARY KEY,
         customer_id VARCHAR(255),
@@ -59,7 +208,7 @@ def create_tables():
         subscription_id VARCHAR(255),
         synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
-    
+
     CREATE TABLE IF NOT EXISTS stripe.invoices (
         id VARCHAR(255) PRIMARY KEY,
         customer_id VARCHAR(255),
@@ -72,180 +221,451 @@ def create_tables():
         period_end BIGINT,
         synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
+
+    -- Content hash of each row as last written, so unchanged rows are skipped
+    ALTER TABLE stripe.customers ADD COLUMN IF NOT EXISTS row_hash VARCHAR(32);
+    ALTER TABLE stripe.subscriptions ADD COLUMN IF NOT EXISTS row_hash VARCHAR(32);
+    ALTER TABLE stripe.charges ADD COLUMN IF NOT EXISTS row_hash VARCHAR(32);
+    ALTER TABLE stripe.invoices ADD COLUMN IF NOT EXISTS row_hash VARCHAR(32);
+
+    -- Normalized email, computed once at ingest, for joining to TaskFlow users
+    ALTER TABLE stripe.customers ADD COLUMN IF NOT EXISTS email_key VARCHAR(255);
+    CREATE INDEX IF NOT EXISTS customers_email_key_idx ON stripe.customers (email_key);
+
+    -- One row per stream: the max created of the last completed run
+    CREATE TABLE IF NOT EXISTS stripe.sync_state (
+        stream VARCHAR(50) PRIMARY KEY,
+        high_water BIGINT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- A run splits each stream into created windows [window_start,
+    -- window_end), NULL meaning unbounded, that sync independently. Each
+    -- window checkpoints its cursor and max created with every batch so a
+    -- crashed run resumes where every window left off.
+    CREATE TABLE IF NOT EXISTS stripe.sync_windows (
+        stream VARCHAR(50),
+        window_num INTEGER,
+        window_start BIGINT,
+        window_end BIGINT,
+        run_high_water BIGINT,
+        last_id VARCHAR(255),
+        done BOOLEAN DEFAULT FALSE,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (stream, window_num)
+    );
     """)
-    
-    conn.commit()
-    cur.close()
-    print("✓ Tables created in stripe schema")
 
-def sync_customers():
-    """Sync customers from mock API"""
-    response = requests.get(f"{MOCK_API_URL}/v1/customers?limit=1000")
-    customers = response.json()['data']
-    
-    cur = conn.cursor()
-    
-    values = [
-        (
-            c['id'],
-            c['email'],
-            c['name'],
-            c['created'],
-            c['currency'],
-            c.get('metadata', {}).get('company'),
-            c.get('metadata', {}).get('industry')
-        )
-        for c in customers
-    ]
-    
-    execute_values(
-        cur,
-        """
-        INSERT INTO stripe.customers (id, email, name, created, currency, company, industry)
-        VALUES %s
-        ON CONFLICT (id) DO UPDATE SET
-            email = EXCLUDED.email,
-            name = EXCLUDED.name,
-            synced_at = CURRENT_TIMESTAMP
-        """,
-        values
-    )
-    
     conn.commit()
     cur.close()
-    print(f"✓ Synced {len(customers)} customers")
 
-def sync_subscriptions():
-    """Sync subscriptions from mock API"""
-    response = requests.get(f"{MOCK_API_URL}/v1/subscriptions?limit=1000")
-    subscriptions = response.json()['data']
-    
+def get_high_water(conn, stream):
     cur = conn.cursor()
-    
-    values = [
-        (
-            s['id'],
-            s['customer'],
-            s['status'],
-            s['plan']['id'],
-            s['plan']['amount'],
-            s['plan']['currency'],
-            s['plan']['interval'],
-            s['created'],
-            s.get('canceled_at')
-        )
-        for s in subscriptions
-    ]
-    
-    execute_values(
-        cur,
-        """
-        INSERT INTO stripe.subscriptions 
-        (id, customer_id, status, plan_id, plan_amount, plan_currency, plan_interval, created, canceled_at)
-        VALUES %s
-        ON CONFLICT (id) DO UPDATE SET
-            status = EXCLUDED.status,
-            canceled_at = EXCLUDED.canceled_at,
-            synced_at = CURRENT_TIMESTAMP
-        """,
-        values
-    )
-    
-    conn.commit()
+    cur.execute("SELECT high_water FROM stripe.sync_state WHERE stream = %s", (stream,))
+    row = cur.fetchone()
     cur.close()
-    print(f"✓ Synced {len(subscriptions)} subscriptions")
+    return row[0] if row else None
 
-def sync_charges():
-    """Sync charges from mock API"""
-    response = requests.get(f"{MOCK_API_URL}/v1/charges?limit=1000")
-    charges = response.json()['data']
-    
-    cur = conn.cursor()
-    
-    values = [
-        (
-            c['id'],
-            c['customer'],
-            c['amount'],
-            c['currency'],
-            c['status'],
-            c['paid'],
-            c['created'],
-            c.get('metadata', {}).get('subscription_id')
-        )
-        for c in charges
-    ]
-    
-    execute_values(
-        cur,
-        """
-        INSERT INTO stripe.charges 
-        (id, customer_id, amount, currency, status, paid, created, subscription_id)
-        VALUES %s
-        ON CONFLICT (id) DO UPDATE SET
-            status = EXCLUDED.status,
-            synced_at = CURRENT_TIMESTAMP
-        """,
-        values
-    )
-    
-    conn.commit()
-    cur.close()
-    print(f"✓ Synced {len(charges)} charges")
+def reset_state(stream):
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM stripe.sync_state WHERE stream = %s", (stream,))
+        cur.execute("DELETE FROM stripe.sync_windows WHERE stream = %s", (stream,))
+        conn.commit()
+        cur.close()
 
-def sync_invoices():
-    """Sync invoices from mock API"""
-    response = requests.get(f"{MOCK_API_URL}/v1/invoices?limit=1000")
-    invoices = response.json()['data']
-    
-    cur = conn.cursor()
-    
-    values = [
-        (
-            i['id'],
-            i['customer'],
-            i['subscription'],
-            i['amount_due'],
-            i['amount_paid'],
-            i['status'],
-            i['created'],
-            i['period_start'],
-            i['period_end']
+def window_bounds(high_water, windows):
+    """Created bounds of `windows` ranges covering everything since high_water.
+
+    Starts LOOKBACK_SECONDS before the high-water mark (or from the beginning
+    without one). The first and last ranges are open-ended (None), so no
+    record falls outside them.
+    """
+    start = high_water - LOOKBACK_SECONDS if high_water is not None else None
+    low = start if start is not None else EPOCH_START
+    high = int(time.time()) + 1
+    step = max((high - low) // windows, 1)
+    return [start] + [low + step * k for k in range(1, windows)] + [None]
+
+def plan_windows(stream, windows):
+    """Return the window numbers to sync, resuming an unfinished run if any.
+
+    A new run covers everything created since the last high-water mark, or
+    the whole stream for 'full_read' streams, split by window_bounds().
+    """
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT window_num FROM stripe.sync_windows
+            WHERE stream = %s AND NOT done
+            ORDER BY window_num
+        """, (stream,))
+        pending = [row[0] for row in cur.fetchall()]
+        if pending:
+            print(f"  Resuming {len(pending)} unfinished {stream} window(s)")
+            cur.close()
+            return pending
+
+        high_water = None if STREAMS[stream].get('full_read') else get_high_water(conn, stream)
+        bounds = window_bounds(high_water, windows)
+
+        cur.execute("DELETE FROM stripe.sync_windows WHERE stream = %s", (stream,))
+        execute_values(cur, """
+            INSERT INTO stripe.sync_windows (stream, window_num, window_start, window_end)
+            VALUES %s
+        """, [(stream, k, bounds[k], bounds[k + 1]) for k in range(windows)])
+        conn.commit()
+        cur.close()
+        return list(range(windows))
+
+class CursorExpired(Exception):
+    """The API no longer knows the cursor a stream was resuming from"""
+
+def iter_records(endpoint, params):
+    """Yield every record of a list endpoint, one page in memory at a time.
+
+    Follows has_more/starting_after until the list is exhausted.
+    """
+    params = dict(params)
+    while True:
+        response = session.get(f"{MOCK_API_URL}{endpoint}", params=params)
+        if response.status_code == 400 and 'starting_after' in params:
+            raise CursorExpired(params['starting_after'])
+        response.raise_for_status()
+        page = response.json()
+
+        yield from page['data']
+        if not page['has_more'] or not page['data']:
+            return
+        params['starting_after'] = page['data'][-1]['id']
+
+def batched(records, size):
+    """Group an iterable into lists of at most `size` items"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def row_hash(row):
+    """Content hash of a row, used to skip rewriting unchanged rows"""
+    return hashlib.md5(json.dumps(row, default=str).encode()).hexdigest()
+
+def merge_sql(stream, source):
+    """INSERT ... ON CONFLICT for `source` (VALUES %s or a SELECT).
+
+    Conflicting rows are only rewritten when their content hash differs, and
+    the statement returns (inserted, updated) counts.
+    """
+    config = STREAMS[stream]
+    updates = ''.join(f"{column} = EXCLUDED.{column},\n                " for column in config['update'])
+    return f"""
+        WITH merged AS (
+            INSERT INTO {config['table']} AS target ({', '.join(config['columns'])}, row_hash)
+            {source}
+            ON CONFLICT (id) DO UPDATE SET
+                {updates}row_hash = EXCLUDED.row_hash,
+                synced_at = CURRENT_TIMESTAMP
+            WHERE target.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+            RETURNING (xmax = 0) AS inserted
         )
-        for i in invoices
-    ]
-    
-    execute_values(
-        cur,
-        """
-        INSERT INTO stripe.invoices 
-        (id, customer_id, subscription_id, amount_due, amount_paid, status, created, period_start, period_end)
-        VALUES %s
-        ON CONFLICT (id) DO UPDATE SET
-            status = EXCLUDED.status,
-            amount_paid = EXCLUDED.amount_paid,
-            synced_at = CURRENT_TIMESTAMP
-        """,
-        values
-    )
-    
-    conn.commit()
-    cur.close()
-    print(f"✓ Synced {len(invoices)} invoices")
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM merged
+    """
+
+def upsert(cur, stream, values):
+    pages = execute_values(cur, merge_sql(stream, "VALUES %s"), values, page_size=BATCH_SIZE, fetch=True)
+    return sum(p[0] for p in pages), sum(p[1] for p in pages)
+
+def copy_value(value):
+    """Render one value in COPY's text format"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def copy_merge(cur, stream, values):
+    """Load rows with COPY into a temp staging table, then merge them.
+
+    The merge keeps the upsert semantics: the same columns are updated on
+    conflict, only when the content hash changed, and synced_at is bumped.
+    Temp tables are never WAL-logged, and the staging table is emptied at
+    every commit and reused by later batches on the same pooled connection.
+    """
+    config = STREAMS[stream]
+    stage = f"stage_{stream}"
+    columns = ', '.join(config['columns'] + ['row_hash'])
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {stage}
+        (LIKE {config['table']} INCLUDING DEFAULTS)
+        ON COMMIT DELETE ROWS
+    """)
+
+    buffer = io.StringIO()
+    for row in values:
+        buffer.write('\t'.join(copy_value(v) for v in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {stage} ({columns}) FROM STDIN", buffer)
+
+    cur.execute(merge_sql(stream, f"SELECT DISTINCT ON (id) {columns} FROM {stage} ORDER BY id"))
+    return cur.fetchone()
+
+def load_batch(cur, stream, values):
+    """Write a batch of rows, returning (inserted, updated) counts"""
+    hashed = (tuple(row) + (row_hash(row),) for row in values)
+    if LOADER == 'copy':
+        return copy_merge(cur, stream, hashed)
+    return upsert(cur, stream, hashed)
+
+def sync_window(stream, window_num):
+    """Sync one created window of a stream on a pooled connection.
+
+    Records are streamed page by page and flushed in batches of BATCH_SIZE,
+    so memory stays bounded by one page plus one batch. Each batch is
+    upserted in the same transaction as the window's checkpoint, so a crash
+    loses at most one batch of work.
+    """
+    config = STREAMS[stream]
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT window_start, window_end, run_high_water, last_id
+            FROM stripe.sync_windows
+            WHERE stream = %s AND window_num = %s
+        """, (stream, window_num))
+        window_start, window_end, run_high_water, last_id = cur.fetchone()
+        conn.commit()
+
+        params = {'limit': PAGE_SIZE}
+        if window_start is not None:
+            params['created[gte]'] = window_start
+        if window_end is not None:
+            params['created[lt]'] = window_end
+        if last_id:
+            params['starting_after'] = last_id
+
+        counts = dict.fromkeys(['inserted', 'updated', 'unchanged'], 0)
+        while True:
+            try:
+                for batch in batched(iter_records(config['endpoint'], params), BATCH_SIZE):
+                    inserted, updated = load_batch(cur, stream, (config['row'](r) for r in batch))
+                    batch_high_water = max(r['created'] for r in batch)
+                    run_high_water = max(run_high_water or batch_high_water, batch_high_water)
+                    cur.execute("""
+                        UPDATE stripe.sync_windows
+                        SET run_high_water = %s, last_id = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE stream = %s AND window_num = %s
+                    """, (run_high_water, batch[-1]['id'], stream, window_num))
+                    conn.commit()
+                    counts['inserted'] += inserted
+                    counts['updated'] += updated
+                    counts['unchanged'] += len(batch) - inserted - updated
+                break
+            except CursorExpired as e:
+                # The checkpointed cursor is gone (e.g. the API was reseeded)
+                print(f"  Checkpoint {e} is no longer valid, restarting {stream} window {window_num}")
+                params.pop('starting_after', None)
+                run_high_water = None
+
+        cur.execute("""
+            UPDATE stripe.sync_windows
+            SET run_high_water = %s, done = TRUE, updated_at = CURRENT_TIMESTAMP
+            WHERE stream = %s AND window_num = %s
+        """, (run_high_water, stream, window_num))
+        conn.commit()
+        cur.close()
+    return counts
+
+def finish_stream(stream):
+    """Promote the run's high-water mark once every window is done"""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO stripe.sync_state (stream, high_water)
+            SELECT %(stream)s, GREATEST(
+                (SELECT high_water FROM stripe.sync_state WHERE stream = %(stream)s),
+                MAX(run_high_water)
+            )
+            FROM stripe.sync_windows
+            WHERE stream = %(stream)s
+            ON CONFLICT (stream) DO UPDATE SET
+                high_water = EXCLUDED.high_water,
+                updated_at = CURRENT_TIMESTAMP
+        """, {'stream': stream})
+        cur.execute("DELETE FROM stripe.sync_windows WHERE stream = %s", (stream,))
+        conn.commit()
+        cur.close()
+
+def sync_streams(streams, workers=4, windows=1):
+    """Incrementally sync `streams` from the mock API on a thread pool.
+
+    Only records created since the last completed run's high-water mark
+    (minus LOOKBACK_SECONDS) are requested, except for 'full_read' streams. Every stream is split into
+    `windows` created ranges, and all windows of all streams run
+    concurrently on `workers` threads. A stream's high-water mark only
+    advances once all of its windows have finished.
+    """
+    tasks = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for stream in streams:
+            for window_num in plan_windows(stream, windows):
+                tasks[executor.submit(sync_window, stream, window_num)] = stream
+
+        remaining = {stream: list(tasks.values()).count(stream) for stream in streams}
+        synced = {stream: dict.fromkeys(['inserted', 'updated', 'unchanged'], 0) for stream in streams}
+        errors = []
+        for future in as_completed(tasks):
+            stream = tasks[future]
+            try:
+                for key, count in future.result().items():
+                    synced[stream][key] += count
+            except Exception as e:
+                # Leave the stream's windows pending so the next run resumes them
+                errors.append(e)
+                remaining[stream] = None
+                continue
+            if remaining[stream] is None:
+                continue
+            remaining[stream] -= 1
+            if remaining[stream] == 0:
+                finish_stream(stream)
+                counts = synced[stream]
+                print(f"✓ Synced {sum(counts.values())} {stream} "
+                      f"({counts['inserted']} inserted, {counts['updated']} updated, "
+                      f"{counts['unchanged']} unchanged)")
+
+    if errors:
+        raise errors[0]
+    return synced
+
+def land_window(stream, window_start, window_end, window_num, run, fmt):
+    """Land one created window of a stream as files; returns (entries, records, max created)"""
+    config = STREAMS[stream]
+    params = {'limit': PAGE_SIZE}
+    if window_start is not None:
+        params['created[gte]'] = window_start
+    if window_end is not None:
+        params['created[lt]'] = window_end
+
+    entries = []
+    records = 0
+    high_water = None
+    for n, batch in enumerate(batched(iter_records(config['endpoint'], params), BATCH_SIZE)):
+        entries += landing_zone.write_batch(
+            LANDING_DIR, stream, [config['row'](r) for r in batch], config['columns'],
+            run['synced_at'], run['run_id'], f'w{window_num}-{n:05d}', fmt)
+        records += len(batch)
+        high_water = max(high_water or 0, max(r['created'] for r in batch))
+    return entries, records, high_water
+
+def land_streams(streams, fmt='parquet', workers=4, windows=1, full_refresh=False):
+    """Incrementally sync `streams` into the append-only landing zone.
+
+    Like sync_streams(), every stream is split into created windows that are
+    fetched concurrently, from the high-water mark of the last committed run
+    (minus LOOKBACK_SECONDS). Rows go to new Parquet or Arrow IPC files
+    instead of Postgres, and the run commits all streams at once by writing
+    its manifest. A run that fails writes no manifest, so its files are
+    ignored and the next run starts from the same high-water mark.
+    """
+    started = datetime.now(timezone.utc)
+    run = {'run_id': landing_zone.new_run_id(), 'synced_at': started.replace(tzinfo=None)}
+    tasks = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for stream in streams:
+            full_read = full_refresh or STREAMS[stream].get('full_read')
+            high_water = None if full_read else landing_zone.high_water(LANDING_DIR, stream)
+            bounds = window_bounds(high_water, windows)
+            for k in range(windows):
+                future = executor.submit(land_window, stream, bounds[k], bounds[k + 1], k, run, fmt)
+                tasks[future] = stream
+
+        added = []
+        landed = {stream: {'records': 0, 'high_water': None} for stream in streams}
+        for future in as_completed(tasks):
+            entries, records, high_water = future.result()
+            stream = tasks[future]
+            added += entries
+            landed[stream]['records'] += records
+            if high_water is not None:
+                landed[stream]['high_water'] = max(landed[stream]['high_water'] or 0, high_water)
+
+    landing_zone.write_manifest(LANDING_DIR, {
+        'run_id': run['run_id'],
+        'kind': 'sync',
+        'format': fmt,
+        'started_at': started.isoformat(),
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'streams': landed,
+        'added': sorted(added, key=lambda e: e['path']),
+        'removed': [],
+    })
+    for stream in streams:
+        files = sum(1 for e in added if e['stream'] == stream)
+        print(f"✓ Landed {landed[stream]['records']} {stream} in {files} {fmt} file(s)")
+    return landed
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sync the mock Stripe API into PostgreSQL or a Parquet/Arrow landing zone')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='Ignore saved checkpoints and re-read every stream')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Rows upserted and checkpointed (or landed per file) per batch')
+    parser.add_argument('--loader', choices=['upsert', 'copy'], default=LOADER,
+                        help='Batch loader: execute_values upsert or COPY + merge')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Threads (and Postgres connections) used to sync in parallel')
+    parser.add_argument('--windows', type=int, default=1,
+                        help='Created windows each stream is split into for parallel extraction')
+    parser.add_argument('--streams', nargs='+', choices=list(STREAMS), default=list(STREAMS),
+                        help='Streams to sync (default: all)')
+    parser.add_argument('--output', choices=['postgres', 'landing'], default='postgres',
+                        help='Upsert into Postgres, or append files to the landing zone')
+    parser.add_argument('--format', choices=list(landing_zone.FORMATS), default='parquet',
+                        help='Landing zone file format: Parquet or Arrow IPC')
+    parser.add_argument('--landing-dir', default=LANDING_DIR,
+                        help='Landing zone root directory')
+    parser.add_argument('--compact', action='store_true',
+                        help='Instead of syncing, merge the landing zone\'s small files per stream and day')
+    args = parser.parse_args()
+    BATCH_SIZE = args.batch_size
+    LOADER = args.loader
+    LANDING_DIR = args.landing_dir
+
+    if args.compact:
+        partitions, deleted = landing_zone.compact(LANDING_DIR, args.streams, args.format)
+        print(f"✓ Compacted {partitions} partition(s), deleted {deleted} file(s)")
+        raise SystemExit(0)
+
     print("=" * 60)
-    print("Mock Stripe API → PostgreSQL Sync")
+    if args.output == 'landing':
+        print(f"Mock Stripe API → {args.format} landing zone")
+    else:
+        print("Mock Stripe API → PostgreSQL Sync")
     print("=" * 60)
-    
-    create_tables()
-    sync_customers()
-    sync_subscriptions()
-    sync_charges()
-    sync_invoices()
-    
-    conn.close()
-    
+
+    if args.output == 'landing':
+        init_pools(args.workers, database=False)
+        try:
+            land_streams(args.streams, fmt=args.format, workers=args.workers,
+                         windows=args.windows, full_refresh=args.full_refresh)
+        finally:
+            close_pools()
+    else:
+        init_pools(args.workers)
+        create_tables()
+        if args.full_refresh:
+            for stream in args.streams:
+                reset_state(stream)
+        try:
+            sync_streams(args.streams, workers=args.workers, windows=args.windows)
+        finally:
+            close_pools()
+
     print("=" * 60)
     print("✅ Sync complete!")
     print("=" * 60)
@@ -0,0 +1,256 @@
+"""Compact column-wise storage for the mock Stripe API's generated records.
+
+A list of nested dicts spends hundreds of bytes per record on dict headers and
+repeated strings ('usd', 'charge', plan ids, customer ids). `ColumnarTable`
+flattens every record into typed `array` columns instead:
+
+- integers (amounts, timestamps) are stored as 64-bit ints,
+- `prefix_<24 hex>` ids are stored as their 12 raw bytes,
+- everything else (strings, booleans, None) is interned as a category and
+  stored as a small integer code.
+
+Dicts are only rebuilt for the records being serialized in a page.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+ID_HEX_LENGTH = 24
+ID_BYTES = ID_HEX_LENGTH // 2
+
+
+def code_typecode(size):
+    """Smallest unsigned array typecode that can hold `size` category codes"""
+    if size <= 0xFF:
+        return 'B'
+    if size <= 0xFFFF:
+        return 'H'
+    return 'I'
+
+
+class IntColumn:
+    def __init__(self, values=None):
+        self.values = values if values is not None else array('q')
+
+    def append(self, value):
+        self.values.append(value)
+
+    def __getitem__(self, pos):
+        return self.values[pos]
+
+    def take(self, order):
+        return IntColumn(array('q', (self.values[p] for p in order)))
+
+
+class CategoricalColumn:
+    """Interned values plus one small integer code per row"""
+
+    def __init__(self, categories=None, codes=None):
+        self.categories = categories if categories is not None else []
+        self.codes = codes if codes is not None else array('B')
+        self.lookup = {value: code for code, value in enumerate(self.categories)}
+
+    @classmethod
+    def from_values(cls, values):
+        column = cls()
+        for value in values:
+            column.append(value)
+        return column
+
+    def append(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self.lookup[value] = code
+            if code_typecode(code + 1) != self.codes.typecode:
+                self.codes = array(code_typecode(code + 1), self.codes)
+        self.codes.append(code)
+
+    def __getitem__(self, pos):
+        return self.categories[self.codes[pos]]
+
+    def take(self, order):
+        codes = array(self.codes.typecode, (self.codes[p] for p in order))
+        return CategoricalColumn(self.categories, codes)
+
+    def freeze(self):
+        """Drop the value -> code map once no more rows will be appended"""
+        self.lookup = None
+
+
+class IdColumn:
+    """`prefix_<24 hex>` ids stored as fixed-width raw bytes"""
+
+    def __init__(self, prefix, digests=None):
+        self.prefix = prefix
+        self.digests = digests if digests is not None else bytearray()
+        self.order = None
+
+    @staticmethod
+    def accepts(value):
+        if not isinstance(value, str) or '_' not in value:
+            return False
+        digest = value.rsplit('_', 1)[1]
+        return len(digest) == ID_HEX_LENGTH and all(c in '0123456789abcdef' for c in digest)
+
+    def append(self, value):
+        prefix, digest = value.rsplit('_', 1)
+        if prefix != self.prefix:
+            raise ValueError(f'id {value!r} does not start with {self.prefix}_')
+        self.digests += bytes.fromhex(digest)
+
+    def digest(self, pos):
+        return bytes(self.digests[pos * ID_BYTES:(pos + 1) * ID_BYTES])
+
+    def __getitem__(self, pos):
+        return f'{self.prefix}_{self.digest(pos).hex()}'
+
+    def __len__(self):
+        return len(self.digests) // ID_BYTES
+
+    def take(self, order):
+        return IdColumn(self.prefix, bytearray(b''.join(self.digest(p) for p in order)))
+
+    def build_index(self):
+        """Sort positions by digest so ids can be found by binary search"""
+        self.order = array('I', sorted(range(len(self)), key=self.digest))
+
+    def position(self, value):
+        """Row of `value`, or None. O(log n) over the sorted digests."""
+        prefix, _, digest = value.rpartition('_')
+        if prefix != self.prefix or len(digest) != ID_HEX_LENGTH:
+            return None
+        try:
+            target = bytes.fromhex(digest)
+        except ValueError:
+            return None
+        k = bisect_left(self.order, target, key=self.digest)
+        if k < len(self.order) and self.digest(self.order[k]) == target:
+            return self.order[k]
+        return None
+
+
+def flatten(record, path=()):
+    for key, value in record.items():
+        if isinstance(value, dict):
+            yield from flatten(value, path + (key,))
+        else:
+            yield path + (key,), value
+
+
+class ColumnarTable:
+    """Records of one resource, stored column by column in list order"""
+
+    def __init__(self, paths, columns, length):
+        self.paths = paths
+        self.columns = columns
+        self.length = length
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from an iterable of dicts that all share one shape"""
+        paths, columns, length = None, None, 0
+        for record in records:
+            items = list(flatten(record))
+            if paths is None:
+                paths = [path for path, _ in items]
+                columns = [cls._new_column(path, value) for path, value in items]
+            for i, (_, value) in enumerate(items):
+                cls._accept(columns, i, value).append(value)
+            length += 1
+        return cls(paths or [], columns or [], length)
+
+    @staticmethod
+    def _new_column(path, value):
+        if path == ('id',) and IdColumn.accepts(value):
+            return IdColumn(value.rsplit('_', 1)[0])
+        if isinstance(value, int) and not isinstance(value, bool):
+            return IntColumn()
+        return CategoricalColumn()
+
+    @staticmethod
+    def _accept(columns, i, value):
+        """Widen an int column into a categorical one if `value` does not fit"""
+        column = columns[i]
+        if isinstance(column, IntColumn) and (not isinstance(value, int) or isinstance(value, bool)):
+            column = CategoricalColumn.from_values(column.values)
+            columns[i] = column
+        return column
+
+    def __len__(self):
+        return self.length
+
+    def column(self, name):
+        return self.columns[self.paths.index(tuple(name.split('.')))]
+
+    def record(self, pos):
+        """Materialize row `pos` as the original nested dict"""
+        record = {}
+        for path, column in zip(self.paths, self.columns):
+            target = record
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = column[pos]
+        return record
+
+    def records(self, positions):
+        return [self.record(pos) for pos in positions]
+
+    def take(self, order):
+        """New table holding the rows of `order`, in that order"""
+        return ColumnarTable(self.paths, [column.take(order) for column in self.columns], len(order))
+
+    def sorted_by(self, name, reverse=False):
+        values = self.column(name)
+        return self.take(sorted(range(self.length), key=values.__getitem__, reverse=reverse))
+
+    def finish(self):
+        """Build the id index and drop build-time lookups"""
+        for column in self.columns:
+            if isinstance(column, IdColumn):
+                column.build_index()
+            elif isinstance(column, CategoricalColumn):
+                column.freeze()
+        return self
+
+    def position(self, record_id):
+        if not self.length:
+            return None
+        return self.column('id').position(record_id)
+
+
+class GroupIndex:
+    """Rows grouped by one column's value, each group kept in table order.
+
+    Stored CSR-style: one array of row positions sorted by (group, row) plus
+    an offsets array, so a group is a zero-copy slice.
+    """
+
+    def __init__(self, table, name):
+        column = table.column(name)
+        self.lookup = {value: code for code, value in enumerate(column.categories)}
+        counts = [0] * (len(column.categories) + 1)
+        for code in column.codes:
+            counts[code + 1] += 1
+        for code in range(len(column.categories)):
+            counts[code + 1] += counts[code]
+        self.offsets = array('Q', counts)
+        self.rows = array('I', sorted(range(len(table)), key=column.codes.__getitem__))
+
+    def view(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            return range(0)
+        return memoryview(self.rows)[self.offsets[code]:self.offsets[code + 1]]
+
+
+def descending_window(view, values, lo=None, hi=None):
+    """Slice of `view` whose `values` fall in [lo, hi].
+
+    `view` is a sequence of rows along which `values` never increase, so
+    both bounds are found by binary search in O(log n).
+    """
+    key = lambda row: -values[row]
+    start = bisect_left(view, -hi, key=key) if hi is not None else 0
+    end = bisect_right(view, -lo, key=key) if lo is not None else len(view)
+    return view[start:max(start, end)]
@@ -1,266 +1,735 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, timedelta
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from array import array
+import argparse
+import os
 import random
 import hashlib
+import threading
+
+from columnar import ColumnarTable, GroupIndex, descending_window
 
 app = Flask(__name__)
 CORS(app)
 
 # Seed for consistent data
-random.seed(42)
+SEED = 42
+random.seed(SEED)
+
+PLANS = [
+    {'id': 'starter', 'amount': 2900, 'name': 'Starter'},
+    {'id': 'professional', 'amount': 9900, 'name': 'Professional'},
+    {'id': 'enterprise', 'amount': 29900, 'name': 'Enterprise'}
+]
+COMPANIES = ['Acme Corp', 'Tech Inc', 'StartupXYZ', 'Innovate LLC']
+INDUSTRIES = ['SaaS', 'E-commerce', 'Consulting', 'Agency']
+BASE_DATE = datetime(2025, 1, 1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Mock Stripe API server')
+    parser.add_argument(
+        '--customers', type=int,
+        default=int(os.environ.get('MOCK_STRIPE_CUSTOMERS', 0)),
+        help='Serve N lazily generated customers instead of the fixed 200 '
+             '(env: MOCK_STRIPE_CUSTOMERS)'
+    )
+    parser.add_argument(
+        '--cursor-cache', type=int,
+        default=int(os.environ.get('MOCK_STRIPE_CURSOR_CACHE', 100000)),
+        help='Number of served ids remembered for cursors in scale mode '
+             '(env: MOCK_STRIPE_CURSOR_CACHE)'
+    )
+    parser.add_argument(
+        '--eager', action='store_true',
+        default=os.environ.get('MOCK_STRIPE_EAGER', '') not in ('', '0'),
+        help='Generate all --customers up front into the columnar store '
+             'instead of on demand (env: MOCK_STRIPE_EAGER)'
+    )
+    parser.add_argument(
+        '--page-cache-mb', type=float,
+        default=float(os.environ.get('MOCK_STRIPE_PAGE_CACHE_MB', 64)),
+        help='Size bound of the serialized page cache, 0 disables it '
+             '(env: MOCK_STRIPE_PAGE_CACHE_MB)'
+    )
+    parser.add_argument('--port', type=int, default=int(os.environ.get('STRIPE_API_PORT', 5001)))
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    ARGS = parse_args()
+else:
+    ARGS = argparse.Namespace(
+        customers=int(os.environ.get('MOCK_STRIPE_CUSTOMERS', 0)),
+        cursor_cache=int(os.environ.get('MOCK_STRIPE_CURSOR_CACHE', 100000)),
+        eager=os.environ.get('MOCK_STRIPE_EAGER', '') not in ('', '0'),
+        page_cache_mb=float(os.environ.get('MOCK_STRIPE_PAGE_CACHE_MB', 64)),
+        port=int(os.environ.get('STRIPE_API_PORT', 5001))
+    )
+
+# Record builders shared by the eager and the scale-mode generators
+def customer_record(i, created, company, industry):
+    return {
+        'id': f'cus_{hashlib.md5(str(i).encode()).hexdigest()[:24]}',
+        'object': 'customer',
+        'email': f'customer{i}@example.com',
+        'name': f'Customer {i}',
+        'created': int(created.timestamp()),
+        'currency': 'usd',
+        'delinquent': False,
+        'metadata': {
+            'company': company,
+            'industry': industry
+        }
+    }
+
+def subscription_record(customer, plan, created, status, canceled_at):
+    return {
+        'id': f'sub_{hashlib.md5(customer["id"].encode()).hexdigest()[:24]}',
+        'object': 'subscription',
+        'customer': customer['id'],
+        'status': status,
+        'plan': {
+            'id': plan['id'],
+            'object': 'plan',
+            'amount': plan['amount'],
+            'currency': 'usd',
+            'interval': 'month',
+            'product': plan['name']
+        },
+        'current_period_start': int(created.timestamp()),
+        'current_period_end': int((created + timedelta(days=30)).timestamp()),
+        'created': int(created.timestamp()),
+        'canceled_at': canceled_at,
+        'metadata': {
+            'plan_name': plan['name']
+        }
+    }
+
+def charge_record(sub, charge_num, created, status):
+    # Fix: Use string concatenation instead of nested f-string
+    charge_id_base = sub['id'] + str(charge_num)
+    charge_hash = hashlib.md5(charge_id_base.encode()).hexdigest()[:24]
+
+    return {
+        'id': f'ch_{charge_hash}',
+        'object': 'charge',
+        'amount': sub['plan']['amount'],
+        'currency': 'usd',
+        'customer': sub['customer'],
+        'status': status,
+        'paid': status == 'succeeded',
+        'created': int(created.timestamp()),
+        'metadata': {
+            'subscription_id': sub['id'],
+            'plan': sub['plan']['id']
+        }
+    }
+
+def invoice_record(sub, invoice_num, created):
+    # Fix: Use string concatenation instead of nested f-string
+    invoice_id_base = sub['id'] + str(invoice_num)
+    invoice_hash = hashlib.md5(invoice_id_base.encode()).hexdigest()[:24]
+
+    return {
+        'id': f'in_{invoice_hash}',
+        'object': 'invoice',
+        'customer': sub['customer'],
+        'subscription': sub['id'],
+        'amount_due': sub['plan']['amount'],
+        'amount_paid': sub['plan']['amount'],
+        'status': 'paid',
+        'created': int(created.timestamp()),
+        'currency': 'usd',
+        'period_start': int(created.timestamp()),
+        'period_end': int((created + timedelta(days=30)).timestamp())
+    }
+
+def billing_periods(sub):
+    """Start of every monthly billing period of a subscription"""
+    current = datetime.fromtimestamp(sub['created'])
+    end_date = datetime.fromtimestamp(sub['canceled_at']) if sub['canceled_at'] else datetime.now()
+
+    periods = []
+    while current < end_date:
+        periods.append(current)
+        current += timedelta(days=30)
+    return periods
 
-# Generate consistent fake data
+# Generate consistent fake data. The generators yield records one at a time so
+# they can be streamed straight into a ColumnarTable.
 def generate_customers(count=200):
-    customers = []
-    base_date = datetime(2025, 1, 1)
-    
     for i in range(count):
-        created = base_date + timedelta(days=random.randint(0, 180))
-        customers.append({
-            'id': f'cus_{hashlib.md5(str(i).encode()).hexdigest()[:24]}',
-            'object': 'customer',
-            'email': f'customer{i}@example.com',
-            'name': f'Customer {i}',
-            'created': int(created.timestamp()),
-            'currency': 'usd',
-            'delinquent': False,
-            'metadata': {
-                'company': random.choice(['Acme Corp', 'Tech Inc', 'StartupXYZ', 'Innovate LLC']),
-                'industry': random.choice(['SaaS', 'E-commerce', 'Consulting', 'Agency'])
-            }
-        })
-    return customers
+        created = BASE_DATE + timedelta(days=random.randint(0, 180))
+        yield customer_record(i, created, random.choice(COMPANIES), random.choice(INDUSTRIES))
 
 def generate_subscriptions(customers):
-    subscriptions = []
-    plans = [
-        {'id': 'starter', 'amount': 2900, 'name': 'Starter'},
-        {'id': 'professional', 'amount': 9900, 'name': 'Professional'},
-        {'id': 'enterprise', 'amount': 29900, 'name': 'Enterprise'}
-    ]
-    
     # 40% of customers have subscriptions
-    for customer in random.sample(customers, k=int(len(customers) * 0.4)):
-        plan = random.choice(plans)
+    for pos in random.sample(range(len(customers)), k=int(len(customers) * 0.4)):
+        customer = customers.record(pos)
+        plan = random.choice(PLANS)
         created = datetime.fromtimestamp(customer['created']) + timedelta(days=random.randint(1, 14))
-        
+
         # 90% active, 10% canceled
         status = random.choice(['active'] * 9 + ['canceled'])
         canceled_at = None
         if status == 'canceled':
             canceled_at = int((created + timedelta(days=random.randint(30, 120))).timestamp())
-        
-        subscriptions.append({
-            'id': f'sub_{hashlib.md5(customer["id"].encode()).hexdigest()[:24]}',
-            'object': 'subscription',
-            'customer': customer['id'],
-            'status': status,
-            'plan': {
-                'id': plan['id'],
-                'object': 'plan',
-                'amount': plan['amount'],
-                'currency': 'usd',
-                'interval': 'month',
-                'product': plan['name']
-            },
-            'current_period_start': int(created.timestamp()),
-            'current_period_end': int((created + timedelta(days=30)).timestamp()),
-            'created': int(created.timestamp()),
-            'canceled_at': canceled_at,
-            'metadata': {
-                'plan_name': plan['name']
-            }
-        })
-    return subscriptions
+
+        yield subscription_record(customer, plan, created, status, canceled_at)
 
 def generate_charges(subscriptions):
-    charges = []
-    
-    for sub in subscriptions:
-        created = datetime.fromtimestamp(sub['created'])
-        end_date = datetime.fromtimestamp(sub['canceled_at']) if sub['canceled_at'] else datetime.now()
-        
+    for pos in range(len(subscriptions)):
+        sub = subscriptions.record(pos)
         # Generate monthly charges
-        current = created
-        charge_num = 0
-        while current < end_date:
+        for charge_num, created in enumerate(billing_periods(sub)):
             # 95% success rate
             status = 'succeeded' if random.random() < 0.95 else 'failed'
-            
-            # Fix: Use string concatenation instead of nested f-string
-            charge_id_base = sub['id'] + str(charge_num)
-            charge_hash = hashlib.md5(charge_id_base.encode()).hexdigest()[:24]
-            
-            charges.append({
-                'id': f'ch_{charge_hash}',
-                'object': 'charge',
-                'amount': sub['plan']['amount'],
-                'currency': 'usd',
-                'customer': sub['customer'],
-                'status': status,
-                'paid': status == 'succeeded',
-                'created': int(current.timestamp()),
-                'metadata': {
-                    'subscription_id': sub['id'],
-                    'plan': sub['plan']['id']
-                }
-            })
-            
-            current += timedelta(days=30)
-            charge_num += 1
-            
-    return charges
+            yield charge_record(sub, charge_num, created, status)
 
 def generate_invoices(subscriptions):
-    invoices = []
-    
-    for sub in subscriptions:
-        created = datetime.fromtimestamp(sub['created'])
-        end_date = datetime.fromtimestamp(sub['canceled_at']) if sub['canceled_at'] else datetime.now()
-        
-        current = created
-        invoice_num = 0
-        while current < end_date:
-            # Fix: Use string concatenation instead of nested f-string
-            invoice_id_base = sub['id'] + str(invoice_num)
-            invoice_hash = hashlib.md5(invoice_id_base.encode()).hexdigest()[:24]
-            
-            invoices.append({
-                'id': f'in_{invoice_hash}',
-                'object': 'invoice',
-                'customer': sub['customer'],
-                'subscription': sub['id'],
-                'amount_due': sub['plan']['amount'],
-                'amount_paid': sub['plan']['amount'],
-                'status': 'paid',
-                'created': int(current.timestamp()),
-                'currency': 'usd',
-                'period_start': int(current.timestamp()),
-                'period_end': int((current + timedelta(days=30)).timestamp())
-            })
-            
-            current += timedelta(days=30)
-            invoice_num += 1
-            
-    return invoices
-
-# Generate all data once at startup
-CUSTOMERS = generate_customers(200)
-SUBSCRIPTIONS = generate_subscriptions(CUSTOMERS)
-CHARGES = generate_charges(SUBSCRIPTIONS)
-INVOICES = generate_invoices(SUBSCRIPTIONS)
+    for pos in range(len(subscriptions)):
+        sub = subscriptions.record(pos)
+        for invoice_num, created in enumerate(billing_periods(sub)):
+            yield invoice_record(sub, invoice_num, created)
 
-# API Endpoints
-@app.route('/v1/customers', methods=['GET'])
-def list_customers():
-    limit = int(request.args.get('limit', 100))
-    starting_after = request.args.get('starting_after', None)
-    
-    # Simple pagination
-    start_idx = 0
-    if starting_after:
-        for idx, cust in enumerate(CUSTOMERS):
-            if cust['id'] == starting_after:
-                start_idx = idx + 1
+# Bounds of an open-ended created span, beyond any epoch second in the data
+OPEN_SPAN = (-2 ** 62, 2 ** 62)
+
+BILLING_PERIOD = 30 * 24 * 3600
+# billing_periods() steps in local wall-clock time, so across a DST change a
+# period can start up to an hour away from first + k * BILLING_PERIOD
+PERIOD_SLACK = 3600
+
+def span_overlaps(first, end, lo, hi, billing, now):
+    """Whether a customer's records of one resource may have a created in [lo, hi].
+
+    For charges and invoices, `first` is the subscription's created and `end`
+    its canceled_at (or open-ended): records exist at each billing period
+    start before `end` and before `now`, so this checks whether any such
+    start falls in the range without generating them.
+    """
+    if not billing:
+        return first <= hi and end >= lo
+    lo = max(lo - PERIOD_SLACK, first)
+    start = first + -(-(lo - first) // BILLING_PERIOD) * BILLING_PERIOD
+    return start <= hi + PERIOD_SLACK and start < min(end, now) + PERIOD_SLACK
+
+class LazyDataset:
+    """Scale-mode dataset derived on demand from (seed, customer index).
+
+    Nothing is generated up front: every record of customer `i` is rebuilt
+    from a `random.Random` seeded with (seed, i), using the same md5-based ids
+    as the eager dataset. Lists are ordered by customer index, and a
+    customer's charges and invoices newest first. Positions are
+    (customer index, offset) pairs, and since md5 ids cannot be reversed,
+    cursors are resolved through a bounded registry of recently served ids.
+    """
+
+    def __init__(self, customers, seed=SEED, cursor_cache=100000):
+        self.customers = customers
+        self.seed = seed
+        self.cursor_cache = cursor_cache
+        self.registry = OrderedDict()
+        # Flask serves requests on several threads, so the registry is
+        # only touched under this lock
+        self.registry_lock = threading.Lock()
+        self.records = lru_cache(maxsize=4096)(self._generate)
+        self.spans = None
+        self.spans_lock = threading.Lock()
+
+    def _draw(self, i):
+        """The random draws behind customer `i`, before any record is built.
+
+        Returns (rng, customer fields, subscription fields or None); `rng` is
+        left where the charge statuses continue from.
+        """
+        rng = random.Random(f'{self.seed}:{i}')
+        created = BASE_DATE + timedelta(days=rng.randint(0, 180))
+        customer = (created, rng.choice(COMPANIES), rng.choice(INDUSTRIES))
+
+        # 40% of customers have subscriptions
+        if rng.random() >= 0.4:
+            return rng, customer, None
+
+        plan = rng.choice(PLANS)
+        created = created + timedelta(days=rng.randint(1, 14))
+        status = rng.choice(['active'] * 9 + ['canceled'])
+        canceled_at = None
+        if status == 'canceled':
+            canceled_at = int((created + timedelta(days=rng.randint(30, 120))).timestamp())
+        return rng, customer, (plan, created, status, canceled_at)
+
+    def _generate(self, i):
+        rng, (created, company, industry), subscription = self._draw(i)
+        customer = customer_record(i, created, company, industry)
+        records = {'customers': [customer], 'subscriptions': [], 'charges': [], 'invoices': []}
+        if subscription is None:
+            return records
+
+        sub = subscription_record(customer, *subscription)
+        records['subscriptions'].append(sub)
+
+        for num, period in enumerate(billing_periods(sub)):
+            status = 'succeeded' if rng.random() < 0.95 else 'failed'
+            records['charges'].append(charge_record(sub, num, period, status))
+            records['invoices'].append(invoice_record(sub, num, period))
+        records['charges'].reverse()
+        records['invoices'].reverse()
+        return records
+
+    def register(self, record_id, position):
+        with self.registry_lock:
+            self.registry[record_id] = position
+            self.registry.move_to_end(record_id)
+            if len(self.registry) > self.cursor_cache:
+                self.registry.popitem(last=False)
+
+    def position(self, record_id):
+        """Position of a served id, or None if it was never served or has been evicted"""
+        with self.registry_lock:
+            return self.registry.get(record_id)
+
+    def customer_index(self, customer_id):
+        position = self.position(customer_id)
+        return position[0] if position else None
+
+    def created_spans(self):
+        """Per resource, arrays of the earliest and latest created of each customer's records.
+
+        Built once from the random draws alone, which is far cheaper than
+        generating the records, so a `created` filter can skip customers
+        whose records all fall outside it. For charges and invoices the
+        latest is the cancellation (open-ended while active), and
+        span_overlaps() narrows it to the actual billing period starts.
+        """
+        with self.spans_lock:
+            if self.spans is None:
+                self.spans = self._build_spans()
+        return self.spans
+
+    def _build_spans(self):
+        spans = {resource: (array('q'), array('q'))
+                 for resource in ('customers', 'subscriptions', 'charges', 'invoices')}
+        for i in range(self.customers):
+            _, (created, _, _), subscription = self._draw(i)
+            created = int(created.timestamp())
+            spans['customers'][0].append(created)
+            spans['customers'][1].append(created)
+            first, last, end = OPEN_SPAN[1], OPEN_SPAN[0], OPEN_SPAN[0]
+            if subscription is not None:
+                _, created, _, canceled_at = subscription
+                first = last = int(created.timestamp())
+                end = canceled_at if canceled_at is not None else OPEN_SPAN[1]
+            spans['subscriptions'][0].append(first)
+            spans['subscriptions'][1].append(last)
+            for resource in ('charges', 'invoices'):
+                spans[resource][0].append(first)
+                spans[resource][1].append(end)
+        return spans
+
+    def _walk(self, resource, start, step, lo, hi, predicate, created):
+        i, offset = start
+        if created:
+            firsts, lasts = self.created_spans()[resource]
+            lo_created, hi_created = created
+            billing = resource in ('charges', 'invoices')
+            now = int(datetime.now().timestamp())
+            if billing and lo_created >= now + PERIOD_SLACK:
+                # No billing period has started yet
+                return
+        while lo <= i < hi:
+            if created and not span_overlaps(firsts[i], lasts[i], lo_created, hi_created, billing, now):
+                # Nothing of this customer's falls in the created range
+                i += step
+                offset = None
+                continue
+            items = self.records(i)[resource]
+            if offset is None:
+                offset = 0 if step > 0 else len(items) - 1
+            while 0 <= offset < len(items):
+                if predicate is None or predicate(items[offset]):
+                    yield (i, offset), items[offset]
+                offset += step
+            i += step
+            offset = None
+
+    def page(self, resource, limit, starting_after=None, ending_before=None,
+             lo=0, hi=None, predicate=None, created=None):
+        """Return (records, has_more) for one page, walking at most limit + 1 matches.
+
+        `created` is an inclusive (lo, hi) range of created, either bound None,
+        that records must fall in.
+        """
+        hi = self.customers if hi is None else min(hi, self.customers)
+        if created:
+            lo_created, hi_created = created
+            lo_created = OPEN_SPAN[0] if lo_created is None else lo_created
+            hi_created = OPEN_SPAN[1] if hi_created is None else hi_created
+            created = (lo_created, hi_created)
+            in_range = lambda r: lo_created <= r['created'] <= hi_created
+            predicate = in_range if predicate is None else (lambda r, p=predicate: p(r) and in_range(r))
+        if ending_before:
+            i, offset = ending_before
+            walker = self._walk(resource, (i, offset - 1), -1, lo, hi, predicate, created)
+        elif starting_after:
+            i, offset = starting_after
+            walker = self._walk(resource, (i, offset + 1), 1, lo, hi, predicate, created)
+        else:
+            walker = self._walk(resource, (lo, None), 1, lo, hi, predicate, created)
+
+        page = []
+        has_more = False
+        for position, record in walker:
+            if len(page) == limit:
+                has_more = True
                 break
-    
-    data = CUSTOMERS[start_idx:start_idx + limit]
-    has_more = start_idx + limit < len(CUSTOMERS)
-    
+            page.append((position, record))
+
+        if ending_before:
+            page.reverse()
+        for position, record in page:
+            self.register(record['id'], position)
+            if resource != 'customers':
+                # Customer ids are what `?customer=` fan-outs filter on
+                self.register(record['customer'], (position[0], 0))
+        return [record for _, record in page], has_more
+
+EMPTY_TABLE = ColumnarTable([], [], 0)
+
+if ARGS.customers and not ARGS.eager:
+    LAZY_DATASET = LazyDataset(ARGS.customers, cursor_cache=ARGS.cursor_cache)
+    CUSTOMERS = SUBSCRIPTIONS = CHARGES = INVOICES = EMPTY_TABLE
+else:
+    LAZY_DATASET = None
+    # Generate all data once at startup, straight into columnar tables
+    # Every list is served newest first, as Stripe does, so tables are sorted
+    # by created once here. That also makes any created range a contiguous
+    # slice that can be found by binary search. The generators run on the
+    # unsorted tables first, so the seeded random stream (and with it every
+    # record) is the same as when the data lived in plain lists.
+    CUSTOMERS = ColumnarTable.from_records(generate_customers(ARGS.customers or 200))
+    SUBSCRIPTIONS = ColumnarTable.from_records(generate_subscriptions(CUSTOMERS))
+    CHARGES = ColumnarTable.from_records(generate_charges(SUBSCRIPTIONS))
+    INVOICES = ColumnarTable.from_records(generate_invoices(SUBSCRIPTIONS))
+    CUSTOMERS, SUBSCRIPTIONS, CHARGES, INVOICES = (
+        table.sorted_by('created', reverse=True).finish()
+        for table in (CUSTOMERS, SUBSCRIPTIONS, CHARGES, INVOICES)
+    )
+
+    # Secondary indexes for the filtered endpoints. Groups keep the
+    # newest-first order of their table, so a filtered page is a lookup
+    # plus a slice.
+    SUBSCRIPTIONS_BY_STATUS = GroupIndex(SUBSCRIPTIONS, 'status')
+    CHARGES_BY_CUSTOMER = GroupIndex(CHARGES, 'customer')
+    INVOICES_BY_CUSTOMER = GroupIndex(INVOICES, 'customer')
+
+def invalid_request(message, param):
+    response = jsonify({
+        'error': {
+            'type': 'invalid_request_error',
+            'message': message,
+            'param': param
+        }
+    })
+    response.status_code = 400
+    return response
+
+def list_response(data, has_more, url):
     return jsonify({
         'object': 'list',
         'data': data,
         'has_more': has_more,
-        'url': '/v1/customers'
+        'url': url
     })
 
+def page_params():
+    """Parse limit/starting_after/ending_before, or return an error response.
+
+    limit is clamped to Stripe's 1..100.
+    """
+    limit = request.args.get('limit', '100')
+    try:
+        limit = max(1, min(100, int(limit)))
+    except ValueError:
+        return invalid_request(f'Invalid integer: {limit}', 'limit')
+    starting_after = request.args.get('starting_after', None)
+    ending_before = request.args.get('ending_before', None)
+    
+    if starting_after and ending_before:
+        return invalid_request('starting_after and ending_before are mutually exclusive', 'ending_before')
+    return limit, starting_after, ending_before
+
+CREATED_BOUNDS = {
+    'created[gt]': ('lo', 1),
+    'created[gte]': ('lo', 0),
+    'created[lt]': ('hi', -1),
+    'created[lte]': ('hi', 0),
+    'created': (None, 0),
+}
+
+def created_range():
+    """Parse Stripe's created[gt|gte|lt|lte] filters into inclusive (lo, hi).
+
+    Either bound may be None. Returns an error response on a non-integer value.
+    """
+    lo = hi = None
+    for param, (bound, shift) in CREATED_BOUNDS.items():
+        value = request.args.get(param, None)
+        if value is None:
+            continue
+        try:
+            value = int(value) + shift
+        except ValueError:
+            return invalid_request(f'Invalid integer: {value}', param)
+        if bound != 'hi':
+            lo = value if lo is None else max(lo, value)
+        if bound != 'lo':
+            hi = value if hi is None else min(hi, value)
+    return lo, hi
+
+def no_such(url, cursor, param):
+    object_name = url.rsplit('/', 1)[-1].rstrip('s')
+    return invalid_request(f"No such {object_name}: '{cursor}'", param)
+
+def paginate(table, view, url):
+    """Return one Stripe-style list page of `table`.
+
+    `view` is the increasing sequence of table rows being listed: every row
+    for a plain list, or one group of a GroupIndex for a filtered one.
+    `starting_after` returns the page after the cursor and `ending_before`
+    the page before it. Cursors are found by binary search on the id index
+    and then on the view, and only the page's rows are materialized as
+    dicts, so each page costs O(log n + limit) however deep it is. A
+    `created` range narrows the view first, again by binary search, since
+    views are ordered newest first.
+    """
+    params = page_params()
+    if not isinstance(params, tuple):
+        return params
+    limit, starting_after, ending_before = params
+    
+    created = created_range()
+    if not isinstance(created, tuple):
+        return created
+    if created != (None, None) and len(table):
+        view = descending_window(view, table.column('created'), *created)
+    
+    cursor = starting_after or ending_before
+    if cursor:
+        row = table.position(cursor)
+        k = bisect_left(view, row) if row is not None else len(view)
+        if k == len(view) or view[k] != row:
+            return no_such(url, cursor, 'starting_after' if starting_after else 'ending_before')
+    
+    if ending_before:
+        end_idx = k
+        start_idx = max(end_idx - limit, 0)
+        has_more = start_idx > 0
+    else:
+        start_idx = k + 1 if starting_after else 0
+        end_idx = start_idx + limit
+        has_more = end_idx < len(view)
+    
+    return list_response(table.records(view[start_idx:end_idx]), has_more, url)
+
+def lazy_paginate(resource, url, customer=None, predicate=None):
+    """Scale-mode counterpart of paginate(), generating only the requested page.
+
+    Scale-mode lists are ordered by customer index rather than by created,
+    so a `created` range is applied while walking, skipping customers whose
+    records all fall outside it.
+    """
+    params = page_params()
+    if not isinstance(params, tuple):
+        return params
+    limit, starting_after, ending_before = params
+    
+    created = created_range()
+    if not isinstance(created, tuple):
+        return created
+    
+    lo, hi = 0, None
+    if customer:
+        i = LAZY_DATASET.customer_index(customer)
+        if i is None:
+            return invalid_request(
+                f"No such customer: '{customer}' (scale mode only knows recently served customers)",
+                'customer'
+            )
+        lo, hi = i, i + 1
+    
+    positions = {}
+    for param, cursor in (('starting_after', starting_after), ('ending_before', ending_before)):
+        if cursor:
+            positions[param] = LAZY_DATASET.position(cursor)
+            if positions[param] is None:
+                return no_such(url, cursor, param)
+    
+    data, has_more = LAZY_DATASET.page(
+        resource, limit,
+        starting_after=positions.get('starting_after'),
+        ending_before=positions.get('ending_before'),
+        lo=lo, hi=hi, predicate=predicate,
+        created=created if created != (None, None) else None
+    )
+    return list_response(data, has_more, url)
+
+class PageCache:
+    """LRU cache of serialized response bodies, bounded by total size in bytes.
+
+    Flask serves requests on several threads, so every access holds a lock.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, body):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            # Two requests can serialize the same page; count it once
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[1])
+            self.entries[key] = (etag, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+PAGE_CACHE = PageCache(int(ARGS.page_cache_mb * 1024 * 1024))
+
+def cached_page(view):
+    """Serve list pages from PAGE_CACHE, with ETag / If-None-Match support.
+
+    The eager dataset never changes after startup, so a page is fully
+    determined by (path, query string) and is serialized only once. Scale
+    mode bypasses the cache: its pages register cursors as a side effect and
+    grow as billing periods pass.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if LAZY_DATASET or not PAGE_CACHE.max_bytes:
+            return view(*args, **kwargs)
+        
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        entry = PAGE_CACHE.get(key)
+        if entry is None:
+            response = view(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = (hashlib.md5(body).hexdigest(), body)
+            PAGE_CACHE.put(key, *entry)
+        
+        etag, body = entry
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+    return wrapper
+
+# API Endpoints
+@app.route('/v1/customers', methods=['GET'])
+@cached_page
+def list_customers():
+    if LAZY_DATASET:
+        return lazy_paginate('customers', '/v1/customers')
+    return paginate(CUSTOMERS, range(len(CUSTOMERS)), '/v1/customers')
+
 @app.route('/v1/subscriptions', methods=['GET'])
+@cached_page
 def list_subscriptions():
-    limit = int(request.args.get('limit', 100))
     status = request.args.get('status', None)
     
-    data = SUBSCRIPTIONS
-    if status:
-        data = [s for s in data if s['status'] == status]
+    if LAZY_DATASET:
+        predicate = (lambda s: s['status'] == status) if status else None
+        return lazy_paginate('subscriptions', '/v1/subscriptions', predicate=predicate)
     
-    data = data[:limit]
+    view = range(len(SUBSCRIPTIONS))
+    if status:
+        view = SUBSCRIPTIONS_BY_STATUS.view(status)
     
-    return jsonify({
-        'object': 'list',
-        'data': data,
-        'has_more': False,
-        'url': '/v1/subscriptions'
-    })
+    return paginate(SUBSCRIPTIONS, view, '/v1/subscriptions')
 
 @app.route('/v1/charges', methods=['GET'])
+@cached_page
 def list_charges():
-    limit = int(request.args.get('limit', 100))
     customer = request.args.get('customer', None)
     
-    data = CHARGES
-    if customer:
-        data = [c for c in data if c['customer'] == customer]
+    if LAZY_DATASET:
+        return lazy_paginate('charges', '/v1/charges', customer=customer)
     
-    data = sorted(data, key=lambda x: x['created'], reverse=True)
-    data = data[:limit]
+    view = range(len(CHARGES))
+    if customer:
+        view = CHARGES_BY_CUSTOMER.view(customer)
     
-    return jsonify({
-        'object': 'list',
-        'data': data,
-        'has_more': False,
-        'url': '/v1/charges'
-    })
+    return paginate(CHARGES, view, '/v1/charges')
 
 @app.route('/v1/invoices', methods=['GET'])
+@cached_page
 def list_invoices():
-    limit = int(request.args.get('limit', 100))
     customer = request.args.get('customer', None)
     
-    data = INVOICES
-    if customer:
-        data = [i for i in data if i['customer'] == customer]
+    if LAZY_DATASET:
+        return lazy_paginate('invoices', '/v1/invoices', customer=customer)
     
-    data = sorted(data, key=lambda x: x['created'], reverse=True)
-    data = data[:limit]
+    view = range(len(INVOICES))
+    if customer:
+        view = INVOICES_BY_CUSTOMER.view(customer)
     
-    return jsonify({
-        'object': 'list',
-        'data': data,
-        'has_more': False,
-        'url': '/v1/invoices'
-    })
+    return paginate(INVOICES, view, '/v1/invoices')
 
 @app.route('/health', methods=['GET'])
 def health():
+    if LAZY_DATASET:
+        total_records = {'customers': LAZY_DATASET.customers}
+    else:
+        total_records = {
+            'customers': len(CUSTOMERS),
+            'subscriptions': len(SUBSCRIPTIONS),
+            'charges': len(CHARGES),
+            'invoices': len(INVOICES)
+        }
     return jsonify({
         'status': 'healthy',
         'version': '1.0.0',
+        'mode': 'scale' if LAZY_DATASET else 'fixed',
         'endpoints': [
             '/v1/customers',
             '/v1/subscriptions',
             '/v1/charges',
             '/v1/invoices'
         ],
-        'total_records': {
-            'customers': len(CUSTOMERS),
-            'subscriptions': len(SUBSCRIPTIONS),
-            'charges': len(CHARGES),
-            'invoices': len(INVOICES)
-        }
+        'total_records': total_records
     })
 
 if __name__ == '__main__':
     print("=" * 60)
     print("Mock Stripe API Server")
     print("=" * 60)
-    print(f"Customers: {len(CUSTOMERS)}")
-    print(f"Subscriptions: {len(SUBSCRIPTIONS)}")
-    print(f"Charges: {len(CHARGES)}")
-    print(f"Invoices: {len(INVOICES)}")
+    if LAZY_DATASET:
+        print(f"Scale mode: {LAZY_DATASET.customers} customers, generated on demand")
+    else:
+        print(f"Customers: {len(CUSTOMERS)}")
+        print(f"Subscriptions: {len(SUBSCRIPTIONS)}")
+        print(f"Charges: {len(CHARGES)}")
+        print(f"Invoices: {len(INVOICES)}")
     print("=" * 60)
-    print("Running on http://localhost:5001")
-    print("Health check: http://localhost:5001/health")
+    print(f"Running on http://localhost:{ARGS.port}")
+    print(f"Health check: http://localhost:{ARGS.port}/health")
     print("=" * 60)
     
-    app.run(host='0.0.0.0', port=5001, debug=False)
+    app.run(host='0.0.0.0', port=ARGS.port, debug=False)
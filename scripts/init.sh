@@ -36,6 +36,11 @@ pip install -q -r seed-data/requirements.txt
 echo "Generating sample data..."
 python3 seed-data/generate_sample_data.py
 
+# Extract to Parquet for the DuckDB warehouse
+echo "Extracting production tables to Parquet..."
+pip install -q -r extract/requirements.txt
+python3 extract/extract_to_parquet.py
+
 # Install dbt
 echo "Installing dbt..."
 pip install -q dbt-duckdb
@@ -76,11 +76,16 @@ echo "Waiting for services to start..."
 sleep 10
 
 echo ""
-echo "Step 5: Installing dbt..."
+echo "Step 5: Extracting production tables to Parquet..."
+pip install -q -r extract/requirements.txt
+python3 extract/extract_to_parquet.py
+
+echo ""
+echo "Step 6: Installing dbt..."
 pip install -q dbt-duckdb
 
 echo ""
-echo "Step 6: Running dbt transformations..."
+echo "Step 7: Running dbt transformations..."
 cd dbt
 dbt deps
 dbt run
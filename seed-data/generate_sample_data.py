@@ -1,87 +1,82 @@
+import numpy as np
 import psycopg2
 from faker import Faker
 import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import argparse
+import io
 import json
+import os
 import time
 import sys
 
-fake = Faker()
-Faker.seed(42)
-random.seed(42)
-
-# Try to connect with retries
-max_retries = 5
-retry_delay = 3
-
-conn = None
-for attempt in range(max_retries):
-    try:
-        print(f"Attempting to connect to database (attempt {attempt + 1}/{max_retries})...")
-        conn = psycopg2.connect(
-            host="localhost",
-            port=5432,
-            database="taskflow_production",
-            user="taskflow",
-            password="taskflow_prod_pass",
-            connect_timeout=5  # 5 second timeout
-        )
-        print("✓ Connected successfully!")
-        break
-    except psycopg2.OperationalError as e:
-        if attempt < max_retries - 1:
-            print(f"Connection failed: {e}")
-            print(f"Retrying in {retry_delay} seconds...")
-            time.sleep(retry_delay)
-        else:
-            print(f"❌ Failed to connect after {max_retries} attempts")
-            print(f"Error: {e}")
-            print("\nTroubleshooting steps:")
-            print("1. Check if container is running: docker compose ps")
-            print("2. Check if PostgreSQL is ready: docker exec taskflow-production-db pg_isready -U taskflow")
-            print("3. Check logs: docker logs taskflow-production-db")
-            sys.exit(1)
+SEED = 42
 
-if conn is None:
-    print("❌ Could not establish database connection")
-    sys.exit(1)
+# Users are generated in fixed-size shards, each with its own seed derived from
+# SEED and the shard number. The data therefore only depends on the number of
+# users, never on how many workers generate it, and shard 0 reproduces the
+# original single-process sequence exactly.
+SHARD_SIZE = 10000
+DEFAULT_USERS = 500
 
-cur = conn.cursor()
+DB_PARAMS = dict(
+    host="localhost",
+    port=5432,
+    database="taskflow_production",
+    user="taskflow",
+    password="taskflow_prod_pass",
+    connect_timeout=5  # 5 second timeout
+)
 
-# Check if tables already exist and have data
-print("Checking existing data...")
-cur.execute("""
-    SELECT COUNT(*) 
-    FROM information_schema.tables 
-    WHERE table_name = 'users'
-""")
+# Rows are generated in memory (or streamed, for events) and bulk-loaded with
+# COPY, one round-trip per COPY_PAGE_SIZE rows instead of one per row
+COPY_PAGE_SIZE = 100000
 
-if cur.fetchone()[0] > 0:
-    cur.execute("SELECT COUNT(*) FROM users")
-    user_count = cur.fetchone()[0]
-    if user_count > 0:
-        print(f"\n⚠️  Database already contains {user_count} users")
-        response = input("Delete existing data and regenerate? (yes/no): ")
-        if response.lower() != 'yes':
-            print("Exiting without changes")
-            cur.close()
-            conn.close()
-            sys.exit(0)
-        
-        print("Dropping existing tables...")
-        cur.execute("DROP TABLE IF EXISTS events CASCADE")
-        cur.execute("DROP TABLE IF EXISTS stripe_charges CASCADE")
-        cur.execute("DROP TABLE IF EXISTS subscriptions CASCADE")
-        cur.execute("DROP TABLE IF EXISTS users CASCADE")
-        conn.commit()
-        print("✓ Existing data cleared")
+plan_prices = {
+    'starter': 2900,
+    'professional': 9900,
+    'enterprise': 29900
+}
+
+event_types = [
+    'project_created', 'task_created', 'task_completed',
+    'team_member_invited', 'comment_added', 'file_uploaded',
+    'view_dashboard', 'login'
+]
+
+def connect():
+    # Try to connect with retries
+    max_retries = 5
+    retry_delay = 3
+
+    for attempt in range(max_retries):
+        try:
+            print(f"Attempting to connect to database (attempt {attempt + 1}/{max_retries})...")
+            conn = psycopg2.connect(**DB_PARAMS)
+            print("✓ Connected successfully!")
+            return conn
+        except psycopg2.OperationalError as e:
+            if attempt < max_retries - 1:
+                print(f"Connection failed: {e}")
+                print(f"Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+            else:
+                print(f"❌ Failed to connect after {max_retries} attempts")
+                print(f"Error: {e}")
+                print("\nTroubleshooting steps:")
+                print("1. Check if container is running: docker compose ps")
+                print("2. Check if PostgreSQL is ready: docker exec taskflow-production-db pg_isready -U taskflow")
+                print("3. Check logs: docker logs taskflow-production-db")
+                sys.exit(1)
+
+    print("❌ Could not establish database connection")
+    sys.exit(1)
 
-# Create tables
-print("Creating tables...")
-cur.execute("""
+TABLES_SQL = """
 CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
-    email VARCHAR(255) UNIQUE NOT NULL,
+    email VARCHAR(255) NOT NULL,
     name VARCHAR(255),
     company VARCHAR(255),
     created_at TIMESTAMP NOT NULL,
@@ -91,7 +86,7 @@ CREATE TABLE IF NOT EXISTS users (
 
 CREATE TABLE IF NOT EXISTS subscriptions (
     id SERIAL PRIMARY KEY,
-    user_id INTEGER REFERENCES users(id),
+    user_id INTEGER,
     stripe_subscription_id VARCHAR(255),
     plan VARCHAR(50),
     status VARCHAR(50),
@@ -101,13 +96,16 @@ CREATE TABLE IF NOT EXISTS subscriptions (
     created_at TIMESTAMP
 );
 
+-- Range-partitioned by month on created_at (see ensure_partitions), so
+-- queries on recent events only scan recent partitions
 CREATE TABLE IF NOT EXISTS events (
-    id SERIAL PRIMARY KEY,
-    user_id INTEGER REFERENCES users(id),
+    id SERIAL,
+    user_id INTEGER,
     event_name VARCHAR(255),
     event_properties JSONB,
-    created_at TIMESTAMP
-);
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
 
 CREATE TABLE IF NOT EXISTS stripe_charges (
     id VARCHAR(255) PRIMARY KEY,
@@ -116,187 +114,450 @@ CREATE TABLE IF NOT EXISTS stripe_charges (
     status VARCHAR(50),
     created_at TIMESTAMP
 );
-""")
-conn.commit()
-print("✓ Tables created")
-
-# Generate 500 users over the past 6 months
-print("Generating users...")
-start_date = datetime.now() - timedelta(days=180)
-users = []
-
-for i in range(500):
-    signup_date = start_date + timedelta(days=random.randint(0, 180))
-    
-    # 70% activate within 7 days
-    activated = random.random() < 0.7
-    activated_at = signup_date + timedelta(hours=random.randint(1, 168)) if activated else None
-    
-    # 40% of activated users subscribe
-    plan = None
-    if activated and random.random() < 0.4:
-        plan = random.choice(['starter', 'starter', 'starter', 'professional', 'enterprise'])
-    
-    user = {
-    	'email': f'{fake.user_name()}_{i}@example.com',
-        'name': fake.name(),
-        'company': fake.company(),
-        'created_at': signup_date,
-        'activated_at': activated_at,
-        'plan': plan
-    }
-    users.append(user)
-    
-    cur.execute("""
-        INSERT INTO users (email, name, company, created_at, activated_at, plan)
-        VALUES (%(email)s, %(name)s, %(company)s, %(created_at)s, %(activated_at)s, %(plan)s)
-        RETURNING id
-    """, user)
-    user['id'] = cur.fetchone()[0]
-    
-    if (i + 1) % 100 == 0:
-        print(f"  Generated {i + 1}/500 users...")
-
-conn.commit()
-print(f"✓ Generated {len(users)} users")
-
-# Generate subscriptions
-print("Generating subscriptions...")
-plan_prices = {
-    'starter': 2900,
-    'professional': 9900,
-    'enterprise': 29900
-}
+"""
 
-subscriptions_count = 0
-for user in users:
-    if user['plan']:
-        is_active = random.random() < 0.9
-        started_at = user['activated_at'] + timedelta(days=random.randint(0, 7))
-        canceled_at = None
-        
-        if not is_active:
-            canceled_at = started_at + timedelta(days=random.randint(30, 150))
-        
-        cur.execute("""
-            INSERT INTO subscriptions 
-            (user_id, stripe_subscription_id, plan, status, mrr_cents, started_at, canceled_at, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            user['id'],
-            f"sub_{fake.uuid4()[:24]}",
-            user['plan'],
-            'active' if is_active else 'canceled',
-            plan_prices[user['plan']],
-            started_at,
-            canceled_at,
-            started_at
-        ))
-        subscriptions_count += 1
-
-conn.commit()
-print(f"✓ Generated {subscriptions_count} subscriptions")
-
-# Generate events
-print("Generating events...")
-event_types = [
-    'project_created', 'task_created', 'task_completed',
-    'team_member_invited', 'comment_added', 'file_uploaded',
-    'view_dashboard', 'login'
+# Unique/foreign keys and secondary indexes, kept apart from TABLES_SQL so a
+# fast load can build them once after the data is in instead of maintaining
+# them row by row. Names match the ones Postgres gave the original inline
+# constraints, so existing databases are picked up.
+CONSTRAINTS = [
+    ('users', 'users_email_key', 'UNIQUE (email)'),
+    ('subscriptions', 'subscriptions_user_id_fkey', 'FOREIGN KEY (user_id) REFERENCES users(id)'),
+    ('events', 'events_user_id_fkey', 'FOREIGN KEY (user_id) REFERENCES users(id)'),
 ]
 
-events_count = 0
-for idx, user in enumerate(users):
-    if user['activated_at']:
-        num_events = random.randint(5, 50)
-        event_start = user['activated_at']
-        event_end = min(datetime.now(), event_start + timedelta(days=90))
-        
-        # Skip if event_end is before event_start
-        if event_end <= event_start:
+INDEXES = [
+    ('subscriptions_user_id_idx', 'subscriptions (user_id)'),
+    ('events_user_id_created_at_idx', 'events (user_id, created_at)'),
+]
+
+def prepare_tables(conn, mode=None):
+    """Create the tables and empty them unless appending.
+
+    `mode` is 'force' (replace existing data), 'append' (keep it) or None
+    (ask, when run interactively).
+    """
+    cur = conn.cursor()
+
+    # Databases seeded before events was partitioned have a plain table
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('events')")
+    row = cur.fetchone()
+    unpartitioned = row is not None and row[0] != 'p'
+    if unpartitioned and mode == 'append':
+        print("❌ events is not partitioned; rerun with --force to rebuild it")
+        sys.exit(1)
+
+    print("Checking existing data...")
+    user_count = 0
+    cur.execute("SELECT to_regclass('users') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("SELECT COUNT(*) FROM users")
+        user_count = cur.fetchone()[0]
+    if user_count > 0 and mode is None:
+        print(f"\n⚠️  Database already contains {user_count} users")
+        if not sys.stdin.isatty():
+            print("Refusing to replace data non-interactively; pass --force or --append")
+            sys.exit(1)
+        response = input("Delete existing data and regenerate? (yes/no): ")
+        if response.lower() != 'yes':
+            print("Exiting without changes")
+            cur.close()
+            conn.close()
+            sys.exit(0)
+
+    # Rebuild a legacy events table only once its data is being replaced
+    if unpartitioned:
+        print("Dropping unpartitioned events table...")
+        cur.execute("DROP TABLE events")
+
+    print("Creating tables...")
+    cur.execute(TABLES_SQL)
+    conn.commit()
+    print("✓ Tables created")
+
+    # Always start a fresh load from empty tables and sequences, even if only
+    # a previous failed run left rows or used up ids behind
+    if mode != 'append':
+        print("Truncating existing tables...")
+        cur.execute("TRUNCATE events, stripe_charges, subscriptions, users RESTART IDENTITY")
+        conn.commit()
+        print("✓ Existing data cleared")
+    cur.close()
+
+def month_partition(table, month):
+    return f"{table}_{month:%Y_%m}"
+
+def ensure_partitions(conn, table, start, end):
+    """Create the monthly partitions of `table` covering [start, end]"""
+    cur = conn.cursor()
+    month = start.date().replace(day=1)
+    while month <= end.date():
+        following = (month + timedelta(days=32)).replace(day=1)
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {month_partition(table, month)}
+            PARTITION OF {table} FOR VALUES FROM ('{month}') TO ('{following}')
+        """)
+        month = following
+    conn.commit()
+    cur.close()
+
+def drop_constraints(conn):
+    cur = conn.cursor()
+    for table, name, _ in reversed(CONSTRAINTS):
+        cur.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}")
+    for name, _ in INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+    cur.close()
+
+def add_constraints(conn):
+    """Add whichever of CONSTRAINTS and INDEXES are missing, in one transaction"""
+    cur = conn.cursor()
+    cur.execute("SELECT conname FROM pg_constraint")
+    existing = {row[0] for row in cur.fetchall()}
+    for table, name, definition in CONSTRAINTS:
+        if name not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    for name, definition in INDEXES:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    conn.commit()
+    cur.close()
+
+def copy_value(value):
+    """Render one value in COPY's text format"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def copy_rows(cur, table, columns, rows, partition=None):
+    """COPY an iterable of row tuples into `table`, COPY_PAGE_SIZE rows at a time.
+
+    With `partition`, a function from row to table name, rows are buffered
+    and copied straight into their partitions instead of being routed one
+    by one through the parent.
+    """
+    count = 0
+    buffers = {}
+    for row in rows:
+        target = partition(row) if partition else table
+        buffer = buffers.setdefault(target, [io.StringIO(), 0])
+        buffer[0].write('\t'.join(copy_value(v) for v in row))
+        buffer[0].write('\n')
+        buffer[1] += 1
+        count += 1
+        if buffer[1] == COPY_PAGE_SIZE:
+            buffer[0].seek(0)
+            cur.copy_expert(f"COPY {target} ({', '.join(columns)}) FROM STDIN", buffer[0])
+            del buffers[target]
+    for target, (buffer, _) in buffers.items():
+        buffer.seek(0)
+        cur.copy_expert(f"COPY {target} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+def shard_seed(shard):
+    return SEED + shard
+
+def generate_users(fake, rng, first_index, count, now):
+    # Users sign up over the 6 months before `now`
+    start_date = now - timedelta(days=180)
+    users = []
+
+    for i in range(first_index, first_index + count):
+        signup_date = start_date + timedelta(days=rng.randint(0, 180))
+
+        # 70% activate within 7 days
+        activated = rng.random() < 0.7
+        activated_at = signup_date + timedelta(hours=rng.randint(1, 168)) if activated else None
+
+        # 40% of activated users subscribe
+        plan = None
+        if activated and rng.random() < 0.4:
+            plan = rng.choice(['starter', 'starter', 'starter', 'professional', 'enterprise'])
+
+        users.append({
+            'id': i + 1,
+            'email': f'{fake.user_name()}_{i}@example.com',
+            'name': fake.name(),
+            'company': fake.company(),
+            'created_at': signup_date,
+            'activated_at': activated_at,
+            'plan': plan
+        })
+    return users
+
+def generate_subscriptions(fake, rng, users):
+    subscriptions = []
+    for user in users:
+        if user['plan']:
+            is_active = rng.random() < 0.9
+            started_at = user['activated_at'] + timedelta(days=rng.randint(0, 7))
+            canceled_at = None
+
+            if not is_active:
+                canceled_at = started_at + timedelta(days=rng.randint(30, 150))
+
+            subscriptions.append((
+                user['id'],
+                f"sub_{fake.uuid4()[:24]}",
+                user['plan'],
+                'active' if is_active else 'canceled',
+                plan_prices[user['plan']],
+                started_at,
+                canceled_at,
+                started_at
+            ))
+    return subscriptions
+
+def generate_events(rng, users, now):
+    """Yield event rows one user at a time, so they are never all in memory"""
+    for user in users:
+        if user['activated_at']:
+            num_events = rng.randint(5, 50)
+            event_start = user['activated_at']
+            event_end = min(now, event_start + timedelta(days=90))
+
+            # Skip if event_end is before event_start
+            if event_end <= event_start:
+                continue
+
+            for _ in range(num_events):
+                event_time = event_start + timedelta(
+                    seconds=rng.randint(0, int((event_end - event_start).total_seconds()))
+                )
+
+                event_name = rng.choice(event_types)
+                properties = {
+                    'source': rng.choice(['web', 'mobile', 'api']),
+                    'duration_ms': rng.randint(100, 5000)
+                }
+
+                yield (user['id'], event_name, json.dumps(properties), event_time)
+
+def generate_events_vectorized(np_rng, users, now, batch_users=5000):
+    """Vectorized generate_events(): yield (month, copy_text, row_count) per batch of users and month.
+
+    Event counts, time offsets, names, sources and durations are drawn as
+    NumPy arrays for a whole batch of users. Rows are then assembled from
+    lookup tables of pre-rendered COPY fragments, so there are no per-event
+    dicts, datetimes or json.dumps calls. Same distributions as
+    generate_events(), but a different random stream.
+    """
+    sources = ['web', 'mobile', 'api']
+    durations = range(100, 5001)
+    # "<event_name>\t<event_properties>\t" for every (name, source, duration)
+    fragments = np.array([
+        f'{name}\t{{"source": "{source}", "duration_ms": {duration}}}\t'
+        for name in event_types for source in sources for duration in durations
+    ], dtype=object)
+    now = np.datetime64(now, 'us')
+
+    for first in range(0, len(users), batch_users):
+        batch = [u for u in users[first:first + batch_users] if u['activated_at']]
+        if not batch:
             continue
-            
-        for _ in range(num_events):
-            event_time = event_start + timedelta(
-                seconds=random.randint(0, int((event_end - event_start).total_seconds()))
+        user_ids = np.array([f"{u['id']}\t" for u in batch], dtype=object)
+        starts = np.array([u['activated_at'] for u in batch], dtype='datetime64[us]')
+        ends = np.minimum(now, starts + np.timedelta64(90, 'D'))
+
+        # Skip users whose event window is empty
+        keep = ends > starts
+        user_ids, starts, ends = user_ids[keep], starts[keep], ends[keep]
+        spans = (ends - starts) // np.timedelta64(1, 's')
+
+        counts = np_rng.integers(5, 51, size=len(user_ids))
+        owner = np.repeat(np.arange(len(user_ids)), counts)
+        total = len(owner)
+
+        offsets = np_rng.integers(0, spans[owner] + 1)
+        times = starts[owner] + offsets.astype('timedelta64[s]')
+        fragment = (np_rng.integers(0, len(event_types), size=total) * len(sources)
+                    + np_rng.integers(0, len(sources), size=total)) * len(durations) \
+            + np_rng.integers(0, len(durations), size=total)
+
+        columns = np.empty((total, 4), dtype=object)
+        columns[:, 0] = user_ids[owner]
+        columns[:, 1] = fragments[fragment]
+        columns[:, 2] = np.datetime_as_string(times, unit='us')
+        columns[:, 3] = '\n'
+
+        # Split the batch by month so each chunk goes to a single partition
+        months = times.astype('datetime64[M]')
+        order = np.argsort(months, kind='stable')
+        bounds = np.flatnonzero(np.diff(months[order])) + 1
+        for rows in np.split(order, bounds):
+            month = months[rows[0]].astype(datetime)
+            yield month, ''.join(columns[rows].ravel().tolist()), len(rows)
+
+def copy_chunks(cur, table, columns, chunks):
+    """COPY pre-rendered (month, text, row_count) chunks into the monthly partitions of `table`"""
+    count = 0
+    for month, text, rows in chunks:
+        cur.copy_expert(f"COPY {month_partition(table, month)} ({', '.join(columns)}) FROM STDIN",
+                        io.StringIO(text))
+        count += rows
+    return count
+
+def generate_charges(fake, subscriptions, now):
+    for user_id, _, _, _, mrr_cents, started_at, canceled_at, _ in subscriptions:
+        current_date = started_at
+        end_date = canceled_at if canceled_at else now
+
+        while current_date < end_date:
+            yield (
+                f"ch_{fake.uuid4()[:24]}",
+                f"cus_{fake.uuid4()[:24]}",
+                mrr_cents,
+                'succeeded',
+                current_date
             )
-            
-            event_name = random.choice(event_types)
-            properties = {
-                'source': random.choice(['web', 'mobile', 'api']),
-                'duration_ms': random.randint(100, 5000)
-            }
-            
-            cur.execute("""
-                INSERT INTO events (user_id, event_name, event_properties, created_at)
-                VALUES (%s, %s, %s, %s)
-            """, (user['id'], event_name, json.dumps(properties), event_time))
-            events_count += 1
-    
-    if (idx + 1) % 100 == 0:
-        print(f"  Processed {idx + 1}/500 users...")
-
-conn.commit()
-print(f"✓ Generated {events_count} events")
-
-# Generate charges
-print("Generating charges...")
-charges_count = 0
-cur.execute("SELECT user_id, started_at, canceled_at, mrr_cents FROM subscriptions")
-for user_id, started_at, canceled_at, mrr_cents in cur.fetchall():
-    current_date = started_at
-    end_date = canceled_at if canceled_at else datetime.now()
-    
-    while current_date < end_date:
-        cur.execute("""
-            INSERT INTO stripe_charges (id, customer_id, amount_cents, status, created_at)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            f"ch_{fake.uuid4()[:24]}",
-            f"cus_{fake.uuid4()[:24]}",
-            mrr_cents,
-            'succeeded',
-            current_date
-        ))
-        charges_count += 1
-        current_date += timedelta(days=30)
-
-conn.commit()
-print(f"✓ Generated {charges_count} charges")
-
-# Print summary
-print("\n" + "="*60)
-print("DATABASE SEED SUMMARY")
-print("="*60)
-cur.execute("SELECT COUNT(*) FROM users")
-print(f"Total users: {cur.fetchone()[0]}")
-cur.execute("SELECT COUNT(*) FROM users WHERE activated_at IS NOT NULL")
-print(f"Activated users: {cur.fetchone()[0]}")
-cur.execute("SELECT COUNT(*) FROM subscriptions WHERE status = 'active'")
-print(f"Active subscriptions: {cur.fetchone()[0]}")
-cur.execute("SELECT COUNT(*) FROM events")
-print(f"Total events: {cur.fetchone()[0]}")
-cur.execute("SELECT COUNT(*) FROM stripe_charges")
-print(f"Total charges: {cur.fetchone()[0]}")
-print("="*60)
-
-cur.execute("""
-    SELECT 
-        COUNT(DISTINCT CASE WHEN activated_at IS NOT NULL THEN id END)::FLOAT / COUNT(*)::FLOAT * 100 as activation_rate,
-        COUNT(DISTINCT CASE WHEN plan IS NOT NULL THEN id END)::FLOAT / 
-        COUNT(DISTINCT CASE WHEN activated_at IS NOT NULL THEN id END)::FLOAT * 100 as conversion_rate
-    FROM users
-""")
-activation_rate, conversion_rate = cur.fetchone()
-print(f"\nMetrics Preview:")
-print(f"Activation rate: {activation_rate:.1f}%")
-print(f"Activation → Paid conversion: {conversion_rate:.1f}%")
-
-cur.execute("SELECT SUM(mrr_cents)/100.0 FROM subscriptions WHERE status = 'active'")
-total_mrr = cur.fetchone()[0]
-print(f"Current MRR: ${total_mrr:,.2f}")
-
-cur.close()
-conn.close()
-
-print("\n✅ Sample data generation complete!")
+            current_date += timedelta(days=30)
+
+def seed_shard(shard, first_index, count, now, vectorized=False):
+    """Generate one shard of users and their data and COPY it on its own connection.
+
+    Runs in a worker process. Everything is drawn from a Faker and a Random
+    seeded with shard_seed(shard), in the same order as the original
+    single-process seeder. With `vectorized`, events come from a NumPy
+    generator with the same seed instead.
+    """
+    fake = Faker()
+    fake.seed_instance(shard_seed(shard))
+    rng = random.Random(shard_seed(shard))
+
+    users = generate_users(fake, rng, first_index, count, now)
+    subscriptions = generate_subscriptions(fake, rng, users)
+
+    conn = psycopg2.connect(**DB_PARAMS)
+    cur = conn.cursor()
+    user_columns = ['id', 'email', 'name', 'company', 'created_at', 'activated_at', 'plan']
+    event_columns = ['user_id', 'event_name', 'event_properties', 'created_at']
+    counts = {
+        'users': copy_rows(cur, 'users', user_columns, ([user[c] for c in user_columns] for user in users)),
+        'subscriptions': copy_rows(cur, 'subscriptions', [
+            'user_id', 'stripe_subscription_id', 'plan', 'status', 'mrr_cents', 'started_at', 'canceled_at', 'created_at'
+        ], subscriptions),
+        'events': (
+            copy_chunks(cur, 'events', event_columns,
+                        generate_events_vectorized(np.random.default_rng(shard_seed(shard)), users, now))
+            if vectorized else
+            copy_rows(cur, 'events', event_columns, generate_events(rng, users, now),
+                      partition=lambda row: month_partition('events', row[3]))
+        ),
+        'charges': copy_rows(cur, 'stripe_charges', ['id', 'customer_id', 'amount_cents', 'status', 'created_at'],
+                             generate_charges(fake, subscriptions, now)),
+    }
+    conn.commit()
+    cur.close()
+    conn.close()
+    return counts
+
+def print_summary(cur):
+    print("\n" + "="*60)
+    print("DATABASE SEED SUMMARY")
+    print("="*60)
+    cur.execute("SELECT COUNT(*) FROM users")
+    print(f"Total users: {cur.fetchone()[0]}")
+    cur.execute("SELECT COUNT(*) FROM users WHERE activated_at IS NOT NULL")
+    print(f"Activated users: {cur.fetchone()[0]}")
+    cur.execute("SELECT COUNT(*) FROM subscriptions WHERE status = 'active'")
+    print(f"Active subscriptions: {cur.fetchone()[0]}")
+    cur.execute("SELECT COUNT(*) FROM events")
+    print(f"Total events: {cur.fetchone()[0]}")
+    cur.execute("SELECT COUNT(*) FROM stripe_charges")
+    print(f"Total charges: {cur.fetchone()[0]}")
+    print("="*60)
+
+    cur.execute("""
+        SELECT
+            COUNT(DISTINCT CASE WHEN activated_at IS NOT NULL THEN id END)::FLOAT / COUNT(*)::FLOAT * 100 as activation_rate,
+            COUNT(DISTINCT CASE WHEN plan IS NOT NULL THEN id END)::FLOAT /
+            COUNT(DISTINCT CASE WHEN activated_at IS NOT NULL THEN id END)::FLOAT * 100 as conversion_rate
+        FROM users
+    """)
+    activation_rate, conversion_rate = cur.fetchone()
+    print(f"\nMetrics Preview:")
+    print(f"Activation rate: {activation_rate:.1f}%")
+    print(f"Activation → Paid conversion: {conversion_rate:.1f}%")
+
+    cur.execute("SELECT SUM(mrr_cents)/100.0 FROM subscriptions WHERE status = 'active'")
+    total_mrr = cur.fetchone()[0]
+    print(f"Current MRR: ${total_mrr:,.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate TaskFlow sample data')
+    parser.add_argument('--users', type=int, default=None,
+                        help=f'Number of users to generate (default {DEFAULT_USERS})')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f'Multiply the default {DEFAULT_USERS} users, e.g. --scale 2000 for 1M')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Processes generating and loading shards in parallel')
+    parser.add_argument('--vectorized', action='store_true',
+                        help='Generate events with NumPy (much faster at scale, different random stream)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--force', dest='mode', action='store_const', const='force',
+                      help='Replace existing data without asking')
+    mode.add_argument('--append', dest='mode', action='store_const', const='append',
+                      help='Keep existing data and add the new users after it')
+    parser.add_argument('--fast-load', action='store_true',
+                        help='Load without keys and indexes, then build them once at the end')
+    args = parser.parse_args()
+    total_users = args.users if args.users is not None else int(DEFAULT_USERS * args.scale)
+
+    conn = connect()
+    prepare_tables(conn, args.mode)
+    # Users sign up at most 180 days back, and their events end by `now`
+    now = datetime.now()
+    ensure_partitions(conn, 'events', now - timedelta(days=180), now)
+    if args.fast_load:
+        drop_constraints(conn)
+    else:
+        add_constraints(conn)
+    cur = conn.cursor()
+
+    # User ids are assigned client-side from the global user index (id =
+    # index + 1), so subscriptions and events can reference them without a
+    # RETURNING. Appended users continue after the current max id, in shards
+    # numbered after it so they get fresh seeds.
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM users")
+    base = cur.fetchone()[0]
+    conn.commit()
+
+    shards = [
+        (base + k, first_index, min(SHARD_SIZE, base + total_users - first_index))
+        for k, first_index in enumerate(range(base, base + total_users, SHARD_SIZE))
+    ]
+    print(f"Generating {total_users} users in {len(shards)} shard(s) on {args.workers} worker(s)...")
+
+    totals = dict.fromkeys(['users', 'subscriptions', 'events', 'charges'], 0)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(seed_shard, shard, first_index, count, now, args.vectorized)
+            for shard, first_index, count in shards
+        ]
+        for done, future in enumerate(futures, 1):
+            for table, count in future.result().items():
+                totals[table] += count
+            print(f"  Loaded {done}/{len(shards)} shards ({totals['users']} users, {totals['events']} events)")
+
+    if args.fast_load:
+        print("Building keys and indexes...")
+        add_constraints(conn)
+
+    # Keep the SERIAL sequence ahead of the client-assigned ids
+    cur.execute("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT MAX(id) FROM users))")
+    conn.commit()
+    print(f"✓ Generated {totals['users']} users")
+    print(f"✓ Generated {totals['subscriptions']} subscriptions")
+    print(f"✓ Generated {totals['events']} events")
+    print(f"✓ Generated {totals['charges']} charges")
+
+    print_summary(cur)
+
+    cur.close()
+    conn.close()
+
+    print("\n✅ Sample data generation complete!")
+
+if __name__ == '__main__':
+    main()
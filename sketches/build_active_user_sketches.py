@@ -0,0 +1,306 @@
+# sketches/build_active_user_sketches.py
+"""Approximate active-user metrics from mergeable per-day HyperLogLog sketches.
+
+Keeps one sketch of the users active on each day in
+analytics.active_user_sketches and rebuilds analytics.fct_active_users_approx
+(daily, weekly, monthly, rolling 7- and 28-day active users) by merging them,
+so a month or a rolling window never rescans events or sorts user ids.
+
+Run it after `dbt run`, against the same target: `--target warehouse` (the
+default) reads and writes the DuckDB warehouse, `--target dev` Postgres, as
+in dbt/profiles.yml. Each run only reads user_event_daily rows rebuilt since
+the last one (by last_event_id) and adds their users to those days'
+sketches. Adding a user twice is a no-op, so late events are safe to replay.
+
+    python build_active_user_sketches.py                # incremental
+    python build_active_user_sketches.py --full-refresh
+    python build_active_user_sketches.py --target dev   # Postgres
+    python build_active_user_sketches.py --check        # compare with exact counts
+"""
+import argparse
+import io
+import os
+import time
+from datetime import date, timedelta
+
+import duckdb
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+from hll import DEFAULT_PRECISION, HyperLogLog, estimate
+
+DB_PARAMS = dict(
+    host="localhost",
+    port=5432,
+    database="taskflow_production",
+    user="taskflow",
+    password="taskflow_prod_pass"
+)
+
+# The `warehouse` target's database, relative to dbt/ in profiles.yml
+DUCKDB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'taskflow.duckdb')
+
+TARGETS = ('warehouse', 'dev')
+
+SCHEMA = 'analytics'
+EPOCH = date(1970, 1, 1)
+
+# Days of user_event_daily read per query, to bound memory on a full refresh
+DAYS_PER_BATCH = 31
+
+ROLLING_WINDOWS = {'rolling_7d': 7, 'rolling_28d': 28}
+
+TABLES_SQL = f"""
+CREATE TABLE IF NOT EXISTS {SCHEMA}.active_user_sketches (
+    day DATE PRIMARY KEY,
+    precision SMALLINT NOT NULL,
+    registers BYTEA NOT NULL,
+    active_users INTEGER NOT NULL,
+    last_event_id BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS {SCHEMA}.fct_active_users_approx (
+    grain VARCHAR(20) NOT NULL,
+    period_start DATE NOT NULL,
+    period_end DATE NOT NULL,
+    active_users INTEGER NOT NULL,
+    PRIMARY KEY (grain, period_start)
+);
+"""
+
+
+def connect(target):
+    if target == 'warehouse':
+        return duckdb.connect(DUCKDB_PATH)
+    return psycopg2.connect(**DB_PARAMS)
+
+
+def is_duckdb(conn):
+    return isinstance(conn, duckdb.DuckDBPyConnection)
+
+
+def begin(conn):
+    """A cursor in a new transaction: psycopg2 opens one implicitly, DuckDB autocommits without BEGIN"""
+    cur = conn.cursor()
+    if is_duckdb(conn):
+        cur.begin()
+    return cur
+
+
+def commit(cur):
+    # A DuckDB cursor is a connection of its own, with its own transaction
+    (cur if is_duckdb(cur) else cur.connection).commit()
+    cur.close()
+
+
+def execute(cur, query, params=()):
+    """Run `query`, written with %s placeholders, on either backend"""
+    if is_duckdb(cur):
+        query = query.replace('%s', '?')
+    cur.execute(query, params)
+
+
+def insert_values(cur, query, rows, page_size):
+    """Run an INSERT written with one `VALUES %s` for every row of `rows`"""
+    if is_duckdb(cur):
+        cur.executemany(query.replace('%s', '(' + ', '.join(['?'] * len(rows[0])) + ')'), rows)
+    else:
+        execute_values(cur, query, rows, page_size=page_size)
+
+
+def check_rollup(conn, target):
+    """Stop with a hint if dbt has not built user_event_daily in `target`"""
+    cur = conn.cursor()
+    execute(cur, """
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = %s AND table_name = 'user_event_daily'
+    """, (SCHEMA,))
+    exists = cur.fetchone()[0] > 0
+    cur.close()
+    if not exists:
+        raise SystemExit(f"{SCHEMA}.user_event_daily not found; run `dbt run --target {target}` first")
+
+
+def create_tables(conn, full_refresh):
+    cur = begin(conn)
+    if full_refresh:
+        cur.execute(f"DROP TABLE IF EXISTS {SCHEMA}.active_user_sketches")
+    cur.execute(TABLES_SQL)
+    commit(cur)
+
+
+def load_sketches(cur, precision):
+    """Stored sketches by day and the highest event id they include"""
+    cur.execute(f"SELECT day, precision, registers, last_event_id FROM {SCHEMA}.active_user_sketches")
+    sketches = {}
+    watermark = 0
+    for day, stored_precision, registers, last_event_id in cur.fetchall():
+        if stored_precision != precision:
+            raise SystemExit(f"Sketches were built with precision {stored_precision}; "
+                             f"rerun with --full-refresh to change it to {precision}")
+        sketches[day] = HyperLogLog.from_bytes(precision, bytes(registers))
+        watermark = max(watermark, last_event_id)
+    return sketches, watermark
+
+
+def changed_user_days(cur, watermark):
+    """Yield (day, user ids, last event id) for user_event_daily rows rebuilt since the watermark"""
+    # Listing the days first, rather than MIN/MAX(day), keeps Postgres on the
+    # last_event_id index instead of walking the day index past every old row
+    execute(cur, f"""
+        SELECT DISTINCT day FROM {SCHEMA}.user_event_daily
+        WHERE last_event_id > %s
+        ORDER BY day
+    """, (watermark,))
+    days = [row[0] for row in cur.fetchall()]
+
+    for i in range(0, len(days), DAYS_PER_BATCH):
+        rows = read_user_days(cur, watermark, days[i:i + DAYS_PER_BATCH])
+        rows = rows[np.argsort(rows[:, 0], kind='stable')]
+        day_numbers, starts = np.unique(rows[:, 0], return_index=True)
+        for day, chunk in zip(day_numbers, np.split(rows, starts[1:])):
+            yield EPOCH + timedelta(days=int(day)), chunk[:, 1], int(chunk[:, 2].max())
+
+
+def read_user_days(cur, watermark, days):
+    """(day number, user id, last event id) rows of `days` rebuilt since the watermark, as an int64 array"""
+    query = f"""
+        SELECT day - DATE '1970-01-01', user_id, last_event_id
+        FROM {SCHEMA}.user_event_daily
+        WHERE last_event_id > %s AND day = ANY(%s)
+    """
+    if is_duckdb(cur):
+        execute(cur, query, (watermark, days))
+        return np.column_stack(list(cur.fetchnumpy().values())).astype(np.int64).reshape(-1, 3)
+
+    buf = io.StringIO()
+    cur.copy_expert(f"COPY ({cur.mogrify(query, (watermark, days)).decode()}) TO STDOUT", buf)
+    return np.fromstring(buf.getvalue().replace('\t', '\n'), dtype=np.int64, sep='\n').reshape(-1, 3)
+
+
+def update_sketches(conn, sketches, watermark, precision):
+    cur = begin(conn)
+    updated = []
+    for day, user_ids, last_event_id in changed_user_days(cur, watermark):
+        sketch = sketches.setdefault(day, HyperLogLog(precision))
+        sketch.add(user_ids)
+        updated.append((day, precision, sketch.to_bytes(), sketch.count(), last_event_id))
+
+    if updated:
+        insert_values(cur, f"""
+            INSERT INTO {SCHEMA}.active_user_sketches (day, precision, registers, active_users, last_event_id)
+            VALUES %s
+            ON CONFLICT (day) DO UPDATE SET
+                registers = EXCLUDED.registers,
+                active_users = EXCLUDED.active_users,
+                last_event_id = GREATEST({SCHEMA}.active_user_sketches.last_event_id, EXCLUDED.last_event_id)
+        """, updated, page_size=100)
+    commit(cur)
+    return len(updated)
+
+
+def period_counts(sketches, precision):
+    """(grain, period_start, period_end, active_users) for every grain, by merging daily sketches"""
+    first, last = min(sketches), max(sketches)
+    calendar = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+    # One row of registers per calendar day; days without events stay empty
+    daily = np.zeros((len(calendar), 1 << precision), dtype=np.uint8)
+    for i, day in enumerate(calendar):
+        if day in sketches:
+            daily[i] = sketches[day].registers
+
+    rows = [('day', day, day, int(n)) for day, n in zip(calendar, estimate(daily)) if day in sketches]
+
+    periods = {
+        'week': [day - timedelta(days=day.weekday()) for day in calendar],
+        'month': [day.replace(day=1) for day in calendar],
+    }
+    for grain, starts in periods.items():
+        keys, first_rows = np.unique(np.array(starts, dtype='datetime64[D]'), return_index=True)
+        merged = np.maximum.reduceat(daily, first_rows, axis=0)
+        ends = list(first_rows[1:] - 1) + [len(calendar) - 1]
+        for start, end, n in zip(keys.astype(date), ends, estimate(merged)):
+            rows.append((grain, start, calendar[end], int(n)))
+
+    for grain, window in ROLLING_WINDOWS.items():
+        # Running max over the previous `window` days
+        merged = daily.copy()
+        for lag in range(1, window):
+            np.maximum(merged[lag:], daily[:-lag], out=merged[lag:])
+        for day, n in zip(calendar, estimate(merged)):
+            rows.append((grain, day - timedelta(days=window - 1), day, int(n)))
+
+    return rows
+
+
+def rebuild_metrics(conn, rows):
+    cur = begin(conn)
+    cur.execute(f"TRUNCATE {SCHEMA}.fct_active_users_approx")
+    insert_values(cur, f"""
+        INSERT INTO {SCHEMA}.fct_active_users_approx (grain, period_start, period_end, active_users)
+        VALUES %s
+    """, rows, page_size=1000)
+    commit(cur)
+
+
+def check(conn):
+    """Relative error of the estimates against exact COUNT(DISTINCT) per day, week and month"""
+    cur = conn.cursor()
+    for grain in ('day', 'week', 'month'):
+        execute(cur, f"""
+            WITH exact AS (
+                SELECT DATE_TRUNC(%s, day)::DATE AS period_start, COUNT(DISTINCT user_id) AS active_users
+                FROM {SCHEMA}.user_event_daily
+                GROUP BY 1
+            )
+            SELECT
+                COUNT(*),
+                AVG(ABS(a.active_users - e.active_users)::DOUBLE PRECISION / e.active_users),
+                MAX(ABS(a.active_users - e.active_users)::DOUBLE PRECISION / e.active_users)
+            FROM exact e
+            JOIN {SCHEMA}.fct_active_users_approx a
+                ON a.grain = %s AND a.period_start = e.period_start
+        """, (grain, grain))
+        periods, mean_error, max_error = cur.fetchone()
+        print(f"  {grain:<6} {periods:>5} periods  mean error {mean_error or 0:.2%}  max error {max_error or 0:.2%}")
+    cur.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build approximate active-user metrics from daily sketches')
+    parser.add_argument('--target', choices=TARGETS, default='warehouse',
+                        help='dbt target holding user_event_daily: DuckDB warehouse or Postgres dev')
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION,
+                        help='log2 of the registers per sketch (error ~1.04/sqrt(2**precision))')
+    parser.add_argument('--full-refresh', action='store_true', help='rebuild every daily sketch')
+    parser.add_argument('--check', action='store_true', help='compare estimates with exact counts')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Active-user sketches (precision {args.precision}, target {args.target})")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    conn = connect(args.target)
+    check_rollup(conn, args.target)
+    create_tables(conn, args.full_refresh)
+
+    cur = conn.cursor()
+    sketches, watermark = load_sketches(cur, args.precision)
+    cur.close()
+    updated = update_sketches(conn, sketches, watermark, args.precision)
+    print(f"Updated {updated} daily sketches (events after id {watermark})")
+
+    if sketches:
+        rows = period_counts(sketches, args.precision)
+        rebuild_metrics(conn, rows)
+        print(f"Wrote {len(rows)} rows to {SCHEMA}.fct_active_users_approx")
+
+    if args.check:
+        print("\nEstimate vs exact:")
+        check(conn)
+
+    conn.close()
+    print(f"\nDone in {time.perf_counter() - start:.1f}s")
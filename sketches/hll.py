@@ -0,0 +1,119 @@
+# sketches/hll.py
+"""HyperLogLog distinct counting in plain NumPy, no database extensions.
+
+A sketch is 2**precision one-byte registers. Adding a value hashes it to 64
+bits, uses the top `precision` bits to pick a register and keeps the
+position of the first 1 bit in the rest. Two sketches merge by taking the
+register-wise max, so a week's sketch is the merge of its seven daily ones
+and counts each user once. The relative error is about 1.04 / sqrt(2**precision):
+0.8% at the default precision of 14 (16 KB per sketch).
+"""
+import numpy as np
+
+DEFAULT_PRECISION = 14
+
+
+def hash64(values):
+    """splitmix64 of an integer array: a fast, well-mixed 64-bit hash"""
+    z = np.asarray(values).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class HyperLogLog:
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def from_bytes(cls, precision, data):
+        return cls(precision, np.frombuffer(data, dtype=np.uint8).copy())
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+    def add(self, values):
+        """Add an array of integer ids"""
+        if len(values) == 0:
+            return self
+        hashes = hash64(values)
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        # The remaining bits fit a float64 exactly, so log2 gives the
+        # position of their leading 1 bit
+        rest = (hashes & np.uint64((1 << bits) - 1)).astype(np.float64)
+        rank = np.full(len(rest), bits + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = bits - np.floor(np.log2(rest[nonzero])).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f'cannot merge precision {other.precision} into {self.precision}')
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @classmethod
+    def union(cls, sketches, precision=DEFAULT_PRECISION):
+        merged = cls(precision)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+
+    def count(self):
+        return int(estimate(self.registers))
+
+
+def _sigma(x):
+    if x == 1:
+        return np.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def estimate(registers):
+    """Distinct count of a sketch's registers, or of each row of a 2-D stack.
+
+    Uses Ertl's improved estimator ("New cardinality estimation algorithms
+    for HyperLogLog sketches", 2017), which works from the histogram of
+    register values and stays unbiased across the whole range, where the
+    classic raw estimate with a linear-counting cutover is off by a few
+    percent just above the cutover.
+    """
+    registers = np.asarray(registers)
+    stack = registers.reshape(-1, registers.shape[-1])
+    m = stack.shape[1]
+    q = 64 - (m.bit_length() - 1)
+    histograms = np.zeros((len(stack), q + 2), dtype=np.int64)
+    for i, row in enumerate(stack):
+        histograms[i] = np.bincount(row, minlength=q + 2)
+
+    counts = []
+    for c in histograms:
+        z = m * _tau(1 - c[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + c[k])
+        z += m * _sigma(c[0] / m)
+        counts.append(round(m * m / (2 * np.log(2)) / z))
+    return np.array(counts, dtype=np.int64).reshape(registers.shape[:-1])